@@ -0,0 +1,329 @@
+"""Caches.
+
+`Cache` is an on-disk cache: values are pickled into files named after a hash
+of their key, the program version and `CACHE_FORMAT`. A cache is capped in
+size; least recently used entries are evicted first (reading an entry refreshes
+its modification time).
+
+`RenderCache` keeps rendered docstrings (or highlighted code blocks) in
+memory, in front of an optional `Cache`.
+"""
+
+import os
+import pickle
+import collections
+import hashlib
+import logging
+import tempfile
+import threading
+
+from .version import version
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_FORMAT = '4'  # Bump whenever cached data or rendering change
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+DEFAULT_MAX_ENTRIES = 8192
+
+
+def default_cache_dir():
+    """Return the user's cache directory for `adoc`."""
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+
+    return os.path.join(root, 'adoc')
+
+
+def file_digest(path):
+    """Compute the SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """Return a cheap `(size, mtime)` fingerprint of a file."""
+    stat = os.stat(path)
+
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Cache:
+    """Size-capped, LRU-evicted on-disk cache."""
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+
+    def make_key(self, *parts):
+        """Build a key from `repr`-able parts."""
+        key = repr(
+            (version, CACHE_FORMAT) + parts
+        )
+
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, default=None):
+        """Fetch a value, refreshing its position in the LRU order."""
+        path = self.entry_path(key)
+
+        try:
+            with open(path, 'rb') as fh:
+                value = pickle.load(fh)  # nosec: the cache is user-owned
+
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception:
+            logger.debug(
+                'discarding unreadable cache entry {}'.format(key)
+            )
+
+            self.discard(key)
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Store a value; errors are logged but never raised."""
+        path = self.entry_path(key)
+
+        try:
+            os.makedirs(
+                os.path.dirname(path), exist_ok=True
+            )
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.warning(
+                'unable to write cache entry to {}'.format(self.directory)
+            )
+
+            return
+
+        self.written += os.path.getsize(path)
+
+    def discard(self, key):
+        try:
+            os.remove(
+                self.entry_path(key)
+            )
+        except OSError:
+            pass
+
+    def entries(self):
+        """List `(mtime, size, path)` for all entries."""
+        entries = []
+
+        try:
+            buckets = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+
+        for bucket in buckets:
+            # Other directories (compiled templates...) are not entries.
+            if not bucket.is_dir() or len(bucket.name) != 2:
+                continue
+
+            for entry in os.scandir(bucket.path):
+                stat = entry.stat()
+                entries.append(
+                    (stat.st_mtime_ns, stat.st_size, entry.path)
+                )
+
+        return entries
+
+    def prune(self):
+        """Evict least recently used entries until under `max_size`."""
+        entries = sorted(
+            self.entries()
+        )
+
+        size = sum(entry[1] for entry in entries)
+
+        for mtime, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            size -= entry_size
+
+    def close(self):
+        """Log statistics and enforce the size cap if anything was written."""
+        logger.debug(
+            'cache: {} hits, {} misses'.format(self.hits, self.misses)
+        )
+
+        if self.written:
+            self.prune()
+            self.written = 0
+
+
+class RenderCache:
+    """LRU cache of rendered docstrings, backed by an optional `Cache`.
+
+    Entries are keyed by a hash of the docstring and of the configuration of
+    the formatter (see `formats.formatter_config`), so identical docstrings
+    are only rendered once. The LRU holds up to `max_entries` entries, more
+    during a build if a prerender needs it (until `close`). Instances can be
+    shared between threads.
+
+    Other kinds of texts are cached under another `kind`, which prefixes
+    on-disk keys, and `label`, which names them in statistics.
+    """
+    def __init__(self, store=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 kind='doc', label='docstrings'):
+        self.store = store
+        self.capacity = max_entries
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.kind = kind
+        self.label = label
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def wrap(self, format_func, *config):
+        """Wrap a formatter, caching its output under `config`."""
+        prefix = repr(config) + '\0'
+
+        def format_cached(text):
+            return self.render(format_func, prefix, text)
+
+        return format_cached
+
+    def digest(self, prefix, text):
+        return hashlib.sha256(
+            (prefix + text).encode('utf-8', 'surrogatepass')
+        ).hexdigest()
+
+    def add(self, digest, html):
+        with self.lock:
+            self.entries[digest] = html
+            self.trim()
+
+    def trim(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def prerender(self, format_func, texts, *config, map_func=map):
+        """Render docstrings ahead of time, under `config`.
+
+        Docstrings found neither in memory nor on disk are rendered all at
+        once through `map_func`, which may spread them over worker processes.
+        The LRU grows if needed so that none of them are evicted before use,
+        until `close` is called at the end of the build.
+        """
+        prefix = repr(config) + '\0'
+        pending = collections.OrderedDict()
+
+        texts = set(texts)
+        self.max_entries = max(self.max_entries, len(texts))
+
+        for text in texts:
+            digest = self.digest(prefix, text)
+
+            if digest in self.entries:
+                continue
+
+            html = None
+            if self.store:
+                html = self.store.get(self.store.make_key(self.kind, digest))
+
+            if html is None:
+                pending[digest] = text
+            else:
+                self.add(digest, html)
+                self.store_hits += 1
+
+        rendered = map_func(format_func, list(pending.values()))
+
+        for digest, html in zip(pending, rendered):
+            if self.store:
+                self.store.set(self.store.make_key(self.kind, digest), html)
+
+            self.add(digest, html)
+            self.misses += 1
+
+        return len(pending)
+
+    def render(self, format_func, prefix, text):
+        digest = self.digest(prefix, text)
+
+        with self.lock:
+            html = self.entries.get(digest)
+
+            if html is not None:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+
+                return html
+
+        if self.store:
+            store_key = self.store.make_key(self.kind, digest)
+            html = self.store.get(store_key)
+
+        if html is None:
+            html = format_func(text)
+
+            if self.store:
+                self.store.set(store_key, html)
+
+            self.misses += 1
+        else:
+            self.store_hits += 1
+
+        self.add(digest, html)
+
+        return html
+
+    def close(self):
+        """Log hit rates, shrink the LRU back to its capacity, then close the
+        on-disk store.
+        """
+        total = self.hits + self.store_hits + self.misses
+
+        with self.lock:
+            self.max_entries = self.capacity
+            self.trim()
+
+        if total:
+            logger.debug(
+                '{}: {} rendered, {} from memory, {} from disk '
+                '({:.0%} hit rate)'.format(
+                    self.label, self.misses, self.hits, self.store_hits,
+                    1 - self.misses / total
+                )
+            )
+
+        self.hits = self.store_hits = self.misses = 0
+
+        if self.store:
+            self.store.close()
@@ -8,8 +8,9 @@ import colorlog
 import logging
 import sys
 
+from .cache import Cache, RenderCache, DEFAULT_MAX_SIZE, default_cache_dir
 from .errors import FatalError
-from .httpd import Server
+from .formats import MD_ENGINES, highlight, set_md_engine
 from .parser import ProjectParser
 from .version import version
 from .writers import find_writer
@@ -48,6 +49,8 @@ def cli_setup():
     group.add_argument('--http', type=str, help='HTTP live server')
 
     group.add_argument('--html', type=str, help='HTML output file')
+    group.add_argument('--html-dir', type=str,
+                       help='HTML output directory, one page per module')
     group.add_argument('--md', type=str, help='Markdown output file')
     group.add_argument('--pdf', type=str, help='PDF output file')
 
@@ -59,6 +62,10 @@ def cli_setup():
     group.add_argument('-f', '--docstrings-format', type=str, default='md',
                        help='docstrings format (`md` or `rst`)')
 
+    group.add_argument('--md-engine', type=str, default='markdown',
+                       choices=sorted(MD_ENGINES),
+                       help='Markdown engine (default: `%(default)s`)')
+
     group.add_argument('--strip-docstrings', action='store_true',
                        help='strip docstrings off of embedded YAML documents')
 
@@ -66,11 +73,44 @@ def cli_setup():
                        help='disable parsing of `setup.py`')
 
     group.add_argument('--find-packages', action='store_true',
-                       help='force-find packages using setuptools')
+                       help='find packages even if `setup.py` lists them')
 
     group.add_argument('-x', '--exclude', type=str, action=SplitAppend,
                        help='set excluded packages')
 
+    group.add_argument('--no-gitignore', action='store_true',
+                       help='do not skip files ignored by `.gitignore`')
+
+    group.add_argument('-j', '--jobs', type=int, default=1,
+                       help='number of parsing and rendering processes '
+                            '(`0` for all CPUs)')
+
+    group.add_argument('--outline-threshold', type=int, metavar='KB',
+                       help='scan modules larger than this with the outline '
+                            'scanner instead of fully parsing them')
+
+    group.add_argument('--source-signatures', action='store_true',
+                       help='render decorators, parameters and bases as '
+                            'written in the source code')
+
+    group.add_argument('--external-css', action='store_true',
+                       help='link HTML pages to a separate, content-hashed '
+                            'stylesheet instead of inlining it')
+
+    group.add_argument('--no-highlight', action='store_true',
+                       help='don\'t highlight code blocks (faster draft '
+                            'builds)')
+
+    group.add_argument('--cache-dir', type=str, default=default_cache_dir(),
+                       help='cache directory (default: `%(default)s`)')
+
+    group.add_argument('--cache-size', type=int,
+                       default=DEFAULT_MAX_SIZE // 1024 // 1024,
+                       help='cache size limit in MB (default: %(default)s)')
+
+    group.add_argument('--no-cache', action='store_true',
+                       help='disable caching')
+
     group = ap.add_argument_group('setup.py overrides')
 
     group.add_argument('--project-name', type=str,
@@ -194,18 +234,37 @@ def main(args=None):
     if args.packages:
         metadata['packages'] = args.packages
 
+    def open_cache():
+        if args.no_cache:
+            return None
+
+        return Cache(
+            args.cache_dir, args.cache_size * 1024 * 1024
+        )
+
+    outline = None
+    if args.outline_threshold is not None:
+        outline = args.outline_threshold * 1024
+
     parser = ProjectParser(
         args.project_path,
         metadata,
         no_setup=args.no_setup,
         find_packages=args.find_packages,
         exclude=args.exclude,
-        documents=args.documents
+        documents=args.documents,
+        jobs=args.jobs,
+        cache=open_cache(),
+        outline=outline,
+        source_signatures=args.source_signatures,
+        gitignore=not args.no_gitignore
     )
 
-    if not args.http and not args.html and not args.md and not args.pdf:
+    if not args.http and not args.html and not args.html_dir \
+            and not args.md and not args.pdf:
         logger.error(
-            'no output specified, use `--http`, `--html`, `--md` or `--pdf`'
+            'no output specified, use `--http`, `--html`, `--html-dir`, '
+            '`--md` or `--pdf`'
         )
 
         return 1
@@ -213,6 +272,15 @@ def main(args=None):
     docstrings_format = args.docstrings_format
     strip_docstrings = args.strip_docstrings
 
+    try:
+        set_md_engine(args.md_engine)
+    except FatalError as err:
+        return err.log(return_with=1)
+
+    render_cache = RenderCache(open_cache())
+
+    highlight.setup(not args.no_highlight, open_cache())
+
     if args.http:
         try:
             host, port = args.http.split(':')
@@ -228,8 +296,11 @@ def main(args=None):
 
             return 1
 
+        from .httpd import Server
+
         server = Server(
-            host, port, parser, docstrings_format, strip_docstrings
+            host, port, parser, docstrings_format, strip_docstrings,
+            render_cache, args.external_css
         )
 
         logger.info(
@@ -246,17 +317,22 @@ def main(args=None):
             logger.exception('uncaught exception')
             return 1
     else:
-        filename = args.html or args.md or args.pdf
+        filename = args.html or args.html_dir or args.md or args.pdf
 
         project = parser.parse()
         writer = find_writer(args)
 
         try:
             writer(
-                filename, project, docstrings_format, strip_docstrings
+                filename, project, docstrings_format, strip_docstrings,
+                render_cache=render_cache, jobs=parser.jobs,
+                external_css=args.external_css
             )
         except FatalError as err:
             return err.log(return_with=1)
+        finally:
+            render_cache.close()
+            highlight.close()
 
         logger.info(
             'written {}'.format(filename)
@@ -1,6 +1,19 @@
-"""Python source code generation."""
+"""Python source code generation.
+
+Code generation is table-driven: each supported node type maps to a function
+returning either its code, as a string, or the parts of its code, strings or
+child nodes, as a list. Parts are expanded recursively; past `MAX_DEPTH`
+nested nodes, expansion goes on from an explicit stack so that deeply nested
+expressions stay clear of the recursion limit. Simple expressions (names,
+literals, attributes, calls, containers), which decorators and default values
+usually are, skip parts altogether (see `make_simple`).
+
+Expressions without a dedicated generator are handed to `ast.unparse`, when
+available (Python 3.9+).
+"""
 
 import ast
+import sys
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +27,7 @@ BINARY_OP_MAPPING = {
     ast.Div: '/',
     ast.FloorDiv: '//',
     ast.LShift: '<<',
+    ast.MatMult: '@',
     ast.Mod: '%',
     ast.Mult: '*',
     ast.Pow: '**',
@@ -23,7 +37,7 @@ BINARY_OP_MAPPING = {
 
 UNARY_OP_MAPPING = {
     ast.Invert: '~',
-    ast.Not: 'not',
+    ast.Not: 'not ',
     ast.UAdd: '+',
     ast.USub: '-'
 }
@@ -46,6 +60,41 @@ BOOL_OP_MAPPING = {
     ast.Or: 'or'
 }
 
+# Nesting depth past which parts are expanded from an explicit stack.
+MAX_DEPTH = 50
+
+# Literals are `ast.Constant` nodes from Python 3.8 on, `ast.Num`, `ast.Str`,
+# etc. before (`ast.Constant` doesn't exist before Python 3.6).
+CONSTANT = getattr(ast, 'Constant', None)
+
+# Operator precedence, from lowest to highest. Boolean operations are always
+# parenthesized, they rank as atoms.
+PRECEDENCE_LAMBDA = 1
+PRECEDENCE_IF = 2
+PRECEDENCE_NOT = 3
+PRECEDENCE_COMPARE = 4
+PRECEDENCE_UNARY = 11
+PRECEDENCE_POWER = 12
+PRECEDENCE_ATOM = 13
+
+OPERATORS = {ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp, ast.Lambda}
+
+BINARY_OP_PRECEDENCE = {
+    ast.BitOr: 5,
+    ast.BitXor: 6,
+    ast.BitAnd: 7,
+    ast.LShift: 8,
+    ast.RShift: 8,
+    ast.Add: 9,
+    ast.Sub: 9,
+    ast.Mult: 10,
+    ast.MatMult: 10,
+    ast.Div: 10,
+    ast.FloorDiv: 10,
+    ast.Mod: 10,
+    ast.Pow: PRECEDENCE_POWER
+}
+
 
 def lookup(mapping, atom):
     return mapping.get(
@@ -53,158 +102,548 @@ def lookup(mapping, atom):
     )
 
 
-def make_signature(node):
-    items = []
+def precedence(node):
+    node_type = type(node)
 
-    padding = [None] * (len(node.args) - len(node.defaults))
+    if node_type is ast.BinOp:
+        return BINARY_OP_PRECEDENCE.get(type(node.op), PRECEDENCE_ATOM)
+    elif node_type is ast.UnaryOp:
+        if isinstance(node.op, ast.Not):
+            return PRECEDENCE_NOT
 
-    for arg, default in zip(node.args, padding + node.defaults):
-        if not default:
-            items.append(arg.arg)
-        else:
-            default = make_python(default)
+        return PRECEDENCE_UNARY
+    elif node_type is ast.Compare:
+        return PRECEDENCE_COMPARE
+    elif node_type is ast.IfExp:
+        return PRECEDENCE_IF
+    elif node_type is ast.Lambda:
+        return PRECEDENCE_LAMBDA
+
+    return PRECEDENCE_ATOM
+
+
+def wrap(node, minimum):
+    """Parenthesize a node binding less tightly than `minimum`."""
+    if type(node) in OPERATORS and precedence(node) < minimum:
+        return ['(', node, ')']
+
+    return [node]
+
+
+def join(items, separator=', '):
+    """Join lists of parts with a separator."""
+    parts = []
+
+    for item in items:
+        if parts:
+            parts.append(separator)
+
+        parts += item
+
+    return parts
+
+
+def join_nodes(nodes, separator=', '):
+    """Join child nodes with a separator."""
+    parts = [separator] * (2 * len(nodes) - 1) if nodes else []
+    parts[::2] = nodes
+
+    return parts
+
+
+def iter_parameters(node):
+    """Yield `(prefix, arg, default)` triplets from `ast.arguments`.
+
+    The `/` and `*` separators come with `arg` and `default` set to `None`.
+    """
+    posonlyargs = getattr(node, 'posonlyargs', [])
+    positional = posonlyargs + node.args
+
+    defaults = [None] * (len(positional) - len(node.defaults))
+    defaults += node.defaults
 
-            items.append(
-                '{}={}'.format(arg.arg, default)
-            )
+    for idx, (arg, default) in enumerate(zip(positional, defaults)):
+        yield '', arg, default
+
+        if idx + 1 == len(posonlyargs):
+            yield '/', None, None
 
     if node.vararg:
-        items.append(
-            '*{}'.format(node.vararg.arg)
-        )
+        yield '*', node.vararg, None
+    elif node.kwonlyargs:
+        yield '*', None, None
+
+    for arg, default in zip(node.kwonlyargs, node.kw_defaults):
+        yield '', arg, default
 
     if node.kwarg:
-        items.append(
-            '**{}'.format(node.kwarg.arg)
-        )
+        yield '**', node.kwarg, None
+
+
+def signature_parts(node):
+    """Split `ast.arguments` into parameters, as lists of parts."""
+    items = []
+
+    for prefix, arg, default in iter_parameters(node):
+        parts = [prefix]
+
+        if arg:
+            parts.append(arg.arg)
+
+        if default:
+            parts += ['=', default]
+
+        items.append(parts)
 
     return items
 
 
-def make_python(node):
-    """Generate Python code from an AST node (a subtree).
+def make_signature(node, source=None):
+    """Generate parameters from `ast.arguments`.
+
+    With a `Source`, parameters (including annotations) and default values are
+    sliced from the source code instead.
     """
-    if node is None:
-        return '!!!'
-    elif isinstance(node, ast.Num):
-        return '{}'.format(node.n)
-    elif isinstance(node, ast.Str):
-        return repr(node.s)
-    elif isinstance(node, ast.Bytes):
-        return "b'...'"
-    elif isinstance(node, ast.NameConstant):
-        return repr(node.value)
-    elif isinstance(node, ast.Name):
-        return node.id
-    elif isinstance(node, ast.Attribute):
-        return '{}.{}'.format(
-            make_python(node.value), node.attr
-        )
-    elif isinstance(node, ast.Tuple):
-        items = [
-            make_python(element) for element in node.elts
+    if source is None:
+        return [
+            render(parts) for parts in signature_parts(node)
         ]
 
-        if len(items) == 1:
-            items.append('')
+    items = []
 
-        return '({})'.format(
-            ', '.join(items)
-        )
-    elif isinstance(node, ast.List):
-        items = [
-            make_python(element) for element in node.elts
-        ]
+    for prefix, arg, default in iter_parameters(node):
+        if not arg:
+            items.append(prefix)
+            continue
 
-        return '[{}]'.format(
-            ', '.join(items)
-        )
-    elif isinstance(node, ast.Set):
-        items = [
-            make_python(element) for element in node.elts
-        ]
+        item = prefix + (source.segment(arg) or arg.arg)
+
+        if default:
+            item += ' = ' if arg.annotation else '='
+            item += make_code(default, source)
 
-        return '{{{}}}'.format(
-            ', '.join(items)
+        items.append(item)
+
+    return items
+
+
+def make_code(node, source=None):
+    """Slice the code of a node from a `Source`, or generate it."""
+    if source is not None:
+        code = source.segment(node)
+
+        if code is not None:
+            return code
+
+    return make_python(node)
+
+
+class Source:
+    """Source code sliced along AST node positions.
+
+    Positions are UTF-8 byte offsets, they are available from Python 3.8 on:
+    `segment` returns `None` with older versions. Continuation lines of
+    multi-line segments are dedented by their common indentation.
+    """
+    def __init__(self, contents):
+        self.contents = contents
+        self.lines = None
+
+    def segment(self, node):
+        end_lineno = getattr(node, 'end_lineno', None)
+        if end_lineno is None:
+            return None
+
+        if self.lines is None:
+            self.lines = self.contents.encode('utf-8').splitlines()
+
+        first, last = node.lineno - 1, end_lineno - 1
+
+        if first == last:
+            return self.lines[first][
+                node.col_offset:node.end_col_offset
+            ].decode('utf-8')
+
+        lines = [self.lines[first][node.col_offset:]]
+        lines += self.lines[first + 1:last]
+        lines.append(self.lines[last][:node.end_col_offset])
+
+        indent = min(
+            len(line) - len(line.lstrip())
+            for line in lines[1:] if line.strip()
         )
-    elif isinstance(node, ast.Dict):
-        items = [
-            '{}: {}'.format(make_python(key), make_python(value))
-            for key, value in zip(node.keys, node.values)
-        ]
 
-        return '{{{}}}'.format(
-            ', '.join(items)
+        lines[1:] = [line[indent:] for line in lines[1:]]
+
+        return b'\n'.join(
+            line.rstrip() for line in lines
+        ).decode('utf-8')
+
+
+def make_constant(node):
+    value = node.value
+
+    if isinstance(value, str):
+        return repr(value)
+    elif isinstance(value, bytes):
+        return "b'...'"
+    elif value is Ellipsis:
+        return '...'
+    elif isinstance(value, bool) or value is None:
+        return repr(value)
+
+    return '{}'.format(value)
+
+
+def make_attribute(node):
+    value = node.value
+
+    if type(value) is CONSTANT:
+        literal = value.value
+    else:
+        literal = getattr(value, 'n', None)  # `ast.Num` before Python 3.8
+
+    # `1.real` would read as a float literal.
+    if isinstance(literal, int):
+        return ['(', value, ').', node.attr]
+
+    return wrap(value, PRECEDENCE_ATOM) + ['.', node.attr]
+
+
+def make_tuple(node):
+    if len(node.elts) == 1:
+        return ['(', node.elts[0], ', )']
+
+    return ['('] + join_nodes(node.elts) + [')']
+
+
+def make_dict(node):
+    items = [
+        ['**', value] if key is None else [key, ': ', value]
+        for key, value in zip(node.keys, node.values)
+    ]
+
+    return ['{'] + join(items) + ['}']
+
+
+def make_call(node):
+    items = [[arg] for arg in node.args]
+
+    for keyword in node.keywords:
+        if keyword.arg is None:
+            items.append(['**', keyword.value])
+        else:
+            items.append([keyword.arg, '=', keyword.value])
+
+    return wrap(node.func, PRECEDENCE_ATOM) + ['('] + join(items) + [')']
+
+
+def make_subscript(node):
+    index = node.slice
+
+    if isinstance(index, ast.Tuple) and index.elts:
+        index = join_nodes(index.elts)
+
+        # `x[1,]` indexes with a tuple, `x[1]` doesn't.
+        if len(index) == 1:
+            index.append(',')
+    else:
+        index = [index]
+
+    return wrap(node.value, PRECEDENCE_ATOM) + ['['] + index + [']']
+
+
+def make_slice(node):
+    parts = []
+
+    if node.lower:
+        parts.append(node.lower)
+
+    parts.append(':')
+
+    if node.upper:
+        parts.append(node.upper)
+
+    if node.step:
+        parts += [':', node.step]
+
+    return parts
+
+
+def make_unary_op(node):
+    return [lookup(UNARY_OP_MAPPING, node.op)] + wrap(
+        node.operand, precedence(node)
+    )
+
+
+def make_binary_op(node):
+    level = precedence(node)
+
+    # `**` is right-associative, other operators are left-associative.
+    if isinstance(node.op, ast.Pow):
+        left, right = level + 1, level
+    else:
+        left, right = level, level + 1
+
+    return wrap(node.left, left) + [
+        ' {} '.format(lookup(BINARY_OP_MAPPING, node.op))
+    ] + wrap(node.right, right)
+
+
+def make_compare(node):
+    parts = wrap(node.left, PRECEDENCE_COMPARE + 1)
+
+    for op, right in zip(node.ops, node.comparators):
+        parts.append(
+            ' {} '.format(lookup(COMPARE_OP_MAPPING, op))
         )
-    elif isinstance(node, ast.Call):
-        items = []
+        parts += wrap(right, PRECEDENCE_COMPARE + 1)
+
+    return parts
+
+
+def make_bool_op(node):
+    separator = ' {} '.format(lookup(BOOL_OP_MAPPING, node.op))
+
+    return ['('] + join_nodes(node.values, separator) + [')']
+
+
+def make_if_exp(node):
+    return wrap(node.body, PRECEDENCE_IF + 1) + [
+        ' if '
+    ] + wrap(node.test, PRECEDENCE_IF + 1) + [
+        ' else '
+    ] + wrap(node.orelse, PRECEDENCE_IF)
+
 
-        for arg in node.args:
-            items.append(
-                make_python(arg)
-            )
+def make_lambda(node):
+    parameters = signature_parts(node.args)
+
+    if not parameters:
+        return ['lambda: ', node.body]
+
+    return ['lambda '] + join(parameters) + [': ', node.body]
+
+
+GENERATORS = {
+    ast.Name: lambda node: node.id,
+    ast.Attribute: make_attribute,
+    ast.Starred: lambda node: ['*'] + wrap(node.value, PRECEDENCE_ATOM),
+    ast.Tuple: make_tuple,
+    ast.List: lambda node: ['['] + join_nodes(node.elts) + [']'],
+    ast.Set: lambda node: ['{'] + join_nodes(node.elts) + ['}'],
+    ast.Dict: make_dict,
+    ast.Call: make_call,
+    ast.Subscript: make_subscript,
+    ast.Slice: make_slice,
+    ast.Lambda: make_lambda,
+    ast.UnaryOp: make_unary_op,
+    ast.BinOp: make_binary_op,
+    ast.Compare: make_compare,
+    ast.BoolOp: make_bool_op,
+    ast.IfExp: make_if_exp,
+    ast.arguments: lambda node: join(signature_parts(node)),
+}
+
+if CONSTANT is not None:
+    GENERATORS[CONSTANT] = make_constant
+
+if sys.version_info < (3, 8):  # pragma: no cover
+    GENERATORS.update({
+        ast.Num: lambda node: '{}'.format(node.n),
+        ast.Str: lambda node: repr(node.s),
+        ast.Bytes: lambda node: "b'...'",
+        ast.NameConstant: lambda node: repr(node.value),
+        ast.Ellipsis: lambda node: '...',
+    })
+
+if sys.version_info < (3, 9):  # pragma: no cover
+    GENERATORS.update({
+        ast.Index: lambda node: [node.value],
+        ast.ExtSlice: lambda node: join_nodes(node.dims) + (
+            [','] if len(node.dims) == 1 else []
+        ),
+    })
+
+
+def make_simple(node, depth=0):
+    """Generate code for a simple expression, or return `None`.
+
+    Names, literals, and attributes, calls, lists, tuples and dicts of simple
+    expressions are simple: decorators and default values are usually made of
+    nothing else, and building their code directly is faster than rendering
+    parts.
+    """
+    node_type = type(node)
+
+    if node_type is ast.Name:
+        return node.id
+    elif node_type is CONSTANT:
+        return make_constant(node)
+    elif depth >= MAX_DEPTH:
+        return None
+
+    depth += 1
+
+    if node_type is ast.Attribute:
+        # Literals may need parentheses, see `make_attribute`.
+        if type(node.value) is not CONSTANT:
+            value = make_simple(node.value, depth)
+
+            if value is not None:
+                return '{}.{}'.format(value, node.attr)
+    elif node_type is ast.Call:
+        func = make_simple(node.func, depth)
+        items = make_simple_items(node.args, depth)
+
+        if func is None or items is None:
+            return None
 
         for keyword in node.keywords:
-            items.append(
-                '{}={}'.format(
-                    keyword.arg, make_python(keyword.value)
-                )
-            )
-
-        return '{}({})'.format(
-            make_python(node.func), ', '.join(items)
-        )
-    elif isinstance(node, ast.Lambda):
-        return 'lambda {}: {}'.format(
-            make_python(node.args), make_python(node.body)
-        )
-    elif isinstance(node, ast.UnaryOp):
-        return '{}{}'.format(
-            lookup(UNARY_OP_MAPPING, node.op),
-            make_python(node.operand)
-        )
-    elif isinstance(node, ast.BinOp):
-        return '{} {} {}'.format(
-            make_python(node.left),
-            lookup(BINARY_OP_MAPPING, node.op),
-            make_python(node.right)
-        )
-    elif isinstance(node, ast.Compare):
-        items = [
-            make_python(node.left)
-        ]
+            value = make_simple(keyword.value, depth)
 
-        for op, right in zip(node.ops, node.comparators):
-            items.append(
-                lookup(COMPARE_OP_MAPPING, op)
-            )
-            items.append(
-                make_python(right)
-            )
+            if value is None:
+                return None
+            elif keyword.arg is None:
+                items.append('**' + value)
+            else:
+                items.append('{}={}'.format(keyword.arg, value))
+
+        return '{}({})'.format(func, ', '.join(items))
+    elif node_type is ast.List:
+        items = make_simple_items(node.elts, depth)
+
+        if items is not None:
+            return '[{}]'.format(', '.join(items))
+    elif node_type is ast.Dict:
+        values = make_simple_items(node.values, depth)
+
+        if values is None:
+            return None
 
-        return ' '.join(items)
-    elif isinstance(node, ast.BoolOp):
         items = []
-        for idx, value in enumerate(node.values):
-            if idx:
-                items.append(
-                    lookup(BOOL_OP_MAPPING, node.op)
-                )
-
-            items.append(
-                make_python(value)
-            )
-
-        return '({})'.format(
-            ' '.join(items)
-        )
-    elif isinstance(node, ast.arguments):
-        return ', '.join(
-            make_signature(node)
-        )
+
+        for key, value in zip(node.keys, values):
+            if key is None:
+                items.append('**' + value)
+                continue
+
+            key = make_simple(key, depth)
+
+            if key is None:
+                return None
+
+            items.append('{}: {}'.format(key, value))
+
+        return '{{{}}}'.format(', '.join(items))
+    elif node_type is ast.Tuple:
+        items = make_simple_items(node.elts, depth)
+
+        if items is not None:
+            if len(items) == 1:
+                return '({}, )'.format(items[0])
+
+            return '({})'.format(', '.join(items))
+
+    return None
+
+
+def make_simple_items(nodes, depth):
+    """Generate code for a list of simple expressions, or return `None`."""
+    items = []
+
+    for node in nodes:
+        code = make_simple(node, depth)
+
+        if code is None:
+            return None
+
+        items.append(code)
+
+    return items
+
+
+def fallback(node):
+    """Generate code for nodes without a dedicated generator."""
+    if isinstance(node, ast.expr) and hasattr(ast, 'unparse'):
+        return ast.unparse(node)
 
     logger.error(
         'unsupported node: {}'.format(node)
     )
 
     return '???'
+
+
+def render(parts, depth=0):
+    """Expand code parts into a string.
+
+    Parts are expanded recursively up to `MAX_DEPTH` nested nodes, then by
+    `render_stack`.
+    """
+    if depth >= MAX_DEPTH:
+        return render_stack(parts)
+
+    output = []
+
+    # Local names, this loop runs once per node and per string part.
+    append = output.append
+    get = GENERATORS.get
+
+    for part in parts:
+        if type(part) is not str:
+            if type(part) is ast.Name:
+                part = part.id
+            elif part is None:
+                part = '!!!'
+            else:
+                part = get(type(part), fallback)(part)
+
+                if type(part) is not str:
+                    part = render(part, depth + 1)
+
+        append(part)
+
+    return ''.join(output)
+
+
+def render_stack(parts):
+    """Expand code parts into a string, without recursion."""
+    output = []
+    stack = parts[::-1]
+
+    # Local names, this loop runs once per node and per string part.
+    append = output.append
+    pop = stack.pop
+    get = GENERATORS.get
+
+    while stack:
+        part = pop()
+
+        if type(part) is str:
+            append(part)
+            continue
+
+        if part is None:
+            append('!!!')
+            continue
+
+        code = get(type(part), fallback)(part)
+
+        if type(code) is str:
+            append(code)
+        else:
+            stack += code[::-1]
+
+    return ''.join(output)
+
+
+def make_python(node):
+    """Generate Python code from an AST node (a subtree).
+    """
+    code = make_simple(node)
+
+    if code is None:
+        code = render([node])
+
+    return code
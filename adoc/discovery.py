@@ -0,0 +1,297 @@
+"""Package and source file discovery.
+
+Packages and their Python files are found in a single `os.scandir` traversal.
+Heavy directories (version control, virtual environments, build output...) at
+the root of the traversal are pruned, exclusion patterns are compiled into one
+regular expression and `.gitignore` files are honoured.
+
+Discovery follows `setuptools.find_packages`: a directory is a package when it
+holds an `__init__.py` file and its parent directory is a package as well.
+"""
+
+import os
+import re
+import fnmatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Heavy directories, only pruned at the root of a traversal (see `is_pruned`)
+# as packages may well have subpackages named `build` or `dist`.
+PRUNED_DIRS = {
+    '.eggs',
+    '.git',
+    '.hg',
+    '.mypy_cache',
+    '.nox',
+    '.pytest_cache',
+    '.svn',
+    '.tox',
+    '.venv',
+    '__pycache__',
+    'build',
+    'dist',
+    'node_modules',
+    'venv',
+}
+
+
+def is_pruned(path, is_root=False):
+    """Check whether a directory is skipped: hidden directories and caches
+    are skipped anywhere, `PRUNED_DIRS` at the root of a traversal unless
+    they are packages.
+    """
+    name = os.path.basename(path)
+
+    if name.startswith('.') or name == '__pycache__':
+        return True
+
+    return is_root and name in PRUNED_DIRS \
+        and not os.path.isfile(os.path.join(path, '__init__.py'))
+
+
+def compile_patterns(patterns):
+    """Compile `fnmatch` patterns into a single matching function."""
+    if not patterns:
+        return lambda name: False
+
+    regex = re.compile(
+        '|'.join(
+            '(?:{})'.format(fnmatch.translate(pattern))
+            for pattern in patterns
+        )
+    )
+
+    return lambda name: regex.match(name) is not None
+
+
+def translate_gitignore(pattern):
+    """Translate a `.gitignore` glob to a regular expression."""
+    regex = ''
+    idx = 0
+
+    while idx < len(pattern):
+        if pattern.startswith('**/', idx):
+            regex += '(?:.*/)?'
+            idx += 3
+        elif pattern.startswith('/**', idx) and idx + 3 == len(pattern):
+            regex += '/.*'
+            idx += 3
+        elif pattern.startswith('**', idx):
+            regex += '.*'
+            idx += 2
+        elif pattern[idx] == '*':
+            regex += '[^/]*'
+            idx += 1
+        elif pattern[idx] == '?':
+            regex += '[^/]'
+            idx += 1
+        elif pattern[idx] == '[' and ']' in pattern[idx + 2:]:
+            end = pattern.index(']', idx + 2)
+            regex += '[' + pattern[idx + 1:end].replace('!', '^', 1) + ']'
+            idx = end + 1
+        elif pattern[idx] == '\\' and idx + 1 < len(pattern):
+            regex += re.escape(pattern[idx + 1])
+            idx += 2
+        else:
+            regex += re.escape(pattern[idx])
+            idx += 1
+
+    return regex
+
+
+class GitIgnore:
+    """Matcher for `.gitignore` rules.
+
+    Rules are attached to the directory holding their `.gitignore` file and
+    paths are checked relatively to the traversal root, using `/` separators.
+    """
+    def __init__(self):
+        self.rules = []
+
+    def load(self, directory, base):
+        """Load `directory/.gitignore`, if any, for paths under `base`."""
+        path = os.path.join(directory, '.gitignore')
+
+        try:
+            with open(path) as fh:
+                lines = fh.read().splitlines()
+        except OSError:
+            return
+
+        for line in lines:
+            line = line.rstrip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+
+            if '/' in line:
+                regex = '^' + translate_gitignore(line.lstrip('/')) + '$'
+            else:
+                regex = '^(?:.*/)?' + translate_gitignore(line) + '$'
+
+            self.rules.append(
+                (base, re.compile(regex), negated, dir_only)
+            )
+
+    def ignored(self, path, is_dir):
+        """Check a relative path against rules, the last match wins."""
+        ignored = False
+
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+
+            if base:
+                if not path.startswith(base + '/'):
+                    continue
+
+                relpath = path[len(base) + 1:]
+            else:
+                relpath = path
+
+            if regex.match(relpath):
+                ignored = not negated
+
+        return ignored
+
+
+class Discovery:
+    """Single-pass discovery of packages and their Python files.
+
+    `exclude` patterns apply to both dotted package names and file names, as
+    they did with `setuptools.find_packages` and the former directory listing.
+    """
+    def __init__(self, root='.', exclude=None, gitignore=True):
+        self.root = root
+        self.excluded = compile_patterns(exclude)
+        self.gitignore = GitIgnore() if gitignore else None
+        self.loaded = set()
+
+        self.load_gitignore(root)
+
+    def load_gitignore(self, path):
+        """Load the `.gitignore` files of a directory and of the directories
+        between it and the root, once.
+        """
+        path = os.path.abspath(path)
+
+        if not self.gitignore or path in self.loaded:
+            return
+
+        base = self.relpath(path)
+
+        if base != '.' and not base.startswith('../'):
+            self.load_gitignore(os.path.dirname(path))
+
+        self.loaded.add(path)
+        self.gitignore.load(path, '' if base == '.' else base)
+
+    def relpath(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def is_ignored(self, base, name, is_dir):
+        if not self.gitignore or not self.gitignore.rules:
+            return False
+
+        return self.gitignore.ignored(
+            name if base == '.' else base + '/' + name, is_dir
+        )
+
+    def scan(self, path, is_root=False):
+        """List a directory once, splitting Python files and directories.
+
+        Files and directories are only filtered for packages and for the root
+        of a traversal, other directories are not looked into.
+        """
+        files = []
+        dirs = []
+
+        try:
+            entries = sorted(
+                os.scandir(path), key=lambda entry: entry.name
+            )
+        except OSError:
+            return False, files, dirs
+
+        is_package = any(entry.name == '__init__.py' for entry in entries)
+
+        if not is_package and not is_root:
+            return False, files, dirs
+
+        self.load_gitignore(path)
+
+        base = self.relpath(path)
+
+        for entry in entries:
+            if entry.is_dir():
+                if not is_pruned(entry.path, is_root) \
+                        and '.' not in entry.name \
+                        and not self.is_ignored(base, entry.name, True):
+                    dirs.append(entry)
+
+                continue
+
+            if not entry.name.endswith('.py') or not entry.is_file():
+                continue
+
+            if entry.name in ('__init__.py', '__main__.py'):
+                continue
+
+            if self.excluded(entry.name):
+                continue
+
+            if self.is_ignored(base, entry.name, False):
+                continue
+
+            files.append(
+                (entry.path, entry.name)
+            )
+
+        return is_package, files, dirs
+
+    def list_files(self, path):
+        """List the Python files of a single package."""
+        is_package, files, dirs = self.scan(path, is_root=True)
+
+        return files
+
+    def find_packages(self, where):
+        """Find packages under `where` with their files.
+
+        This returns `(package, package_path, files)` triplets, files being
+        `(path, name)` pairs.
+        """
+        packages = []
+
+        is_package, files, dirs = self.scan(where, is_root=True)
+
+        stack = [(entry, entry.name) for entry in reversed(dirs)]
+
+        while stack:
+            entry, package = stack.pop()
+
+            is_package, files, dirs = self.scan(entry.path)
+
+            if not is_package:
+                continue
+
+            if not self.excluded(package):
+                packages.append(
+                    (package, entry.path, files)
+                )
+
+            stack.extend(
+                (subdir, package + '.' + subdir.name)
+                for subdir in reversed(dirs)
+            )
+
+        return packages
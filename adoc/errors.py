@@ -8,6 +8,10 @@ class FatalError(Exception):
         self.message = message
         self.tb = tb
 
+    def __reduce__(self):
+        # Errors may be raised by worker processes.
+        return FatalError, (self.message, self.tb)
+
     def log(self, return_with=0):
         logger.error(self.message)
 
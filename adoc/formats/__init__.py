@@ -1,17 +1,149 @@
+"""Docstring and document formatters.
+
+Formatters are imported on first use: `markdown` and `docutils` are only
+loaded when a docstring or document actually needs them.
+
+Markdown is formatted by one of several engines, registered in `MD_ENGINES`
+and selected with `set_md_engine`.
+"""
+
 import re
+import importlib
 
-from .md import format_md
-from .rst import format_rst
+from ..errors import FatalError
+from ..utils import compose
+from . import highlight
 
 __all__ = [
     'as_is',
     'stripper',
     'format_md',
-    'format_rst'
+    'format_rst',
+    'formatter_config',
+    'get_formatter',
+    'format_docstring',
+    'set_md_engine',
+    'get_settings',
+    'configure'
 ]
 
 DOCUMENT_MARKER = re.compile(r'^---$', re.M)
 
+MD_EXTENSIONS = [
+    'markdown.extensions.extra',
+    'markdown.extensions.codehilite'
+]
+
+# Code blocks are highlighted by `highlight`, not by `codehilite` itself.
+MD_EXTENSION_CONFIGS = {
+    'markdown.extensions.codehilite': {
+        'use_pygments': False
+    }
+}
+
+RST_WRITER = 'html4css1'
+
+# Markdown engines, by name: modules implementing them and the packages they
+# require.
+MD_ENGINES = {
+    'markdown': ('md', 'markdown'),  # Python-Markdown
+    'markdown-it': ('commonmark', 'markdown_it'),  # Optional
+}
+
+md_engine = 'markdown'
+
+
+def get_md_module(name):
+    return importlib.import_module(
+        '.' + MD_ENGINES[name][0], __name__
+    )
+
+
+def set_md_engine(name):
+    """Select the Markdown engine, making sure it's installed.
+
+    The engine itself is only imported on first use.
+    """
+    global md_engine
+
+    import importlib.util
+
+    if name not in MD_ENGINES:
+        raise FatalError(
+            'unknown Markdown engine: {}'.format(name)
+        )
+
+    if importlib.util.find_spec(MD_ENGINES[name][1]) is None:
+        raise FatalError(
+            'Markdown engine `{}` is not installed'.format(name)
+        )
+
+    md_engine = name
+
+
+def get_settings():
+    """Return the current formatting settings, see `configure`."""
+    return {
+        'md_engine': md_engine,
+        'highlight_code': highlight.enabled
+    }
+
+
+def configure(md_engine='markdown', highlight_code=True):
+    """Set the Markdown engine and whether code blocks are highlighted."""
+    set_md_engine(md_engine)
+
+    highlight.enabled = highlight_code
+
+
+def format_md(text):
+    """Format Markdown text to HTML, with the selected engine."""
+    return get_md_module(md_engine).format_md(text)
+
+
+def format_rst(text):
+    """Format reStructuredText text to HTML."""
+    from . import rst
+
+    return rst.format_rst(text)
+
+
+def get_formatter(name, strip=False):
+    """Get the docstring formatter for a format (`md` or `rst`)."""
+    format_func = format_rst if name == 'rst' else format_md
+
+    if strip:
+        format_func = compose(stripper, format_func)
+
+    return format_func
+
+
+def format_docstring(name, strip, text, settings=None):
+    """Format a docstring, by format name.
+
+    Unlike formatter functions, this can be sent to worker processes, along
+    with formatting `settings` (see `get_settings`) as workers don't
+    necessarily share the settings of their parent.
+    """
+    if settings is not None:
+        configure(**settings)
+
+    return get_formatter(name, strip)(text)
+
+
+def formatter_config(name):
+    """Describe what the output of a docstring formatter depends on.
+
+    This is part of the keys of rendered docstrings in caches.
+    """
+    if name == 'rst':
+        return name, RST_WRITER, highlight.enabled
+
+    return (
+        name, md_engine, tuple(MD_EXTENSIONS), highlight.enabled,
+        sorted(highlight.FORMATTER_OPTIONS.items())
+    )
+
 
 def as_is(text):
     return text
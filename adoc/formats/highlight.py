@@ -0,0 +1,163 @@
+"""Syntax highlighting of code blocks.
+
+The `codehilite` Markdown extension is configured to only mark code blocks up
+(see `formats.MD_EXTENSION_CONFIGS`); blocks are then highlighted here, with
+Pygments, except for raw HTML blocks written by authors. The `commonmark`
+engine highlights code from its renderer instead. Lexers are reused across
+blocks and highlighted blocks are cached by language and code, in a
+`cache.RenderCache`.
+
+Highlighting can be turned off altogether (see `setup`) for faster draft
+builds: code blocks are then left as plain `<pre>` blocks.
+"""
+
+import re
+import html
+
+from ..cache import RenderCache
+
+
+DEFAULT_MAX_ENTRIES = 4096
+
+CSS_CLASS = 'codehilite'
+
+# Code blocks as marked up by `codehilite` and `fenced_code` when not using
+# Pygments, the language and line numbers being set as classes.
+CODE_BLOCK = re.compile(
+    r'<pre( class="{}")?><code(?: class="([^"]*)")?>'
+    r'(.*?)</code></pre>'.format(CSS_CLASS),
+    re.S
+)
+
+LANGUAGE_PREFIX = 'language-'
+
+FORMATTER_OPTIONS = {
+    'cssclass': CSS_CLASS,
+    'wrapcode': True,
+}
+
+
+class Highlighter:
+    """Pygments highlighter with a lexer registry and an output cache.
+
+    Highlighted blocks are cached in memory, in front of an optional `Cache`
+    (see `cache.RenderCache`). Instances can be shared between threads.
+    """
+    def __init__(self, store=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache = RenderCache(
+            store, max_entries, kind='highlight', label='code blocks'
+        )
+        self.lexers = {}
+        self.formatters = {}
+
+    def get_lexer(self, lang, code):
+        """Get a lexer by name, or guess it from the code."""
+        from pygments.lexers import get_lexer_by_name, guess_lexer
+        from pygments.util import ClassNotFound
+
+        if not lang:
+            try:
+                return guess_lexer(code)
+            except ClassNotFound:
+                lang = 'text'
+
+        lexer = self.lexers.get(lang)
+
+        if lexer is None:
+            try:
+                lexer = get_lexer_by_name(lang)
+            except ClassNotFound:
+                lexer = self.get_lexer('text', code)
+
+            self.lexers[lang] = lexer
+
+        return lexer
+
+    def get_formatter(self, linenos):
+        from pygments.formatters import HtmlFormatter
+
+        formatter = self.formatters.get(linenos)
+
+        if formatter is None:
+            formatter = self.formatters[linenos] = HtmlFormatter(
+                linenos=linenos, **FORMATTER_OPTIONS
+            )
+
+        return formatter
+
+    def render(self, code, lang=None, linenos=False):
+        """Highlight code, bypassing the caches."""
+        import pygments
+
+        return pygments.highlight(
+            code, self.get_lexer(lang, code), self.get_formatter(linenos)
+        )
+
+    def highlight(self, code, lang=None, linenos=False):
+        """Highlight code to HTML, going through the cache."""
+        prefix = repr(
+            (lang, linenos, sorted(FORMATTER_OPTIONS.items()))
+        ) + '\0'
+
+        return self.cache.render(
+            lambda code: self.render(code, lang, linenos), prefix, code
+        )
+
+    def highlight_blocks(self, text, source=None):
+        """Highlight the code blocks of an HTML fragment.
+
+        Blocks found as they are in `source`, the text the fragment was
+        formatted from, are raw HTML and are left alone: code in code blocks
+        is escaped.
+        """
+        def replace(match):
+            marked, classes, code = match.groups()
+
+            if source is not None and match.group(0) in source:
+                return match.group(0)
+
+            lang = None
+            for name in (classes or '').split():
+                if name.startswith(LANGUAGE_PREFIX):
+                    lang = name[len(LANGUAGE_PREFIX):]
+
+            output = self.highlight(
+                html.unescape(code), lang, 'linenums' in (classes or '')
+            )
+
+            # `codehilite` markup already comes with the final line break,
+            # and none is kept at the end of the fragment.
+            if marked or match.end() == len(text):
+                return output.rstrip('\n')
+
+            return output
+
+        return CODE_BLOCK.sub(replace, text)
+
+    def close(self):
+        """Log hit rates, then close the on-disk store."""
+        self.cache.close()
+
+
+enabled = True
+highlighter = Highlighter()
+
+
+def setup(enable=True, store=None):
+    """Turn highlighting on or off, and set the on-disk store to use."""
+    global enabled
+
+    enabled = enable
+    highlighter.cache.store = store
+
+
+def highlight_blocks(text, source=None):
+    """Highlight the code blocks of an HTML fragment, if enabled."""
+    if not enabled:
+        return text
+
+    return highlighter.highlight_blocks(text, source)
+
+
+def close():
+    highlighter.close()
@@ -1,13 +1,36 @@
-"""Markdown formatter."""
+"""Markdown formatter.
+
+`markdown.Markdown` instances keep state (footnotes, abbreviations, ...)
+between conversions and can't be shared between threads: each thread gets its
+own converter, which is reset before every conversion.
+"""
+
+import threading
 
 import markdown
 
-md_converter = markdown.Markdown(extensions=[
-    'markdown.extensions.extra',
-    'markdown.extensions.codehilite'
-])
+from . import MD_EXTENSIONS, MD_EXTENSION_CONFIGS, highlight
+
+local = threading.local()
+
+
+def get_converter():
+    """Get the Markdown converter of the current thread.
+
+    Converters are built on first use, extensions being costly to load.
+    """
+    try:
+        return local.converter
+    except AttributeError:
+        local.converter = markdown.Markdown(
+            extensions=MD_EXTENSIONS, extension_configs=MD_EXTENSION_CONFIGS
+        )
+
+    return local.converter
 
 
 def format_md(text):
-    """Format Markdown text to HTML."""
-    return md_converter.convert(text)
+    """Format Markdown text to HTML, highlighting code blocks."""
+    return highlight.highlight_blocks(
+        get_converter().reset().convert(text), text
+    )
@@ -17,14 +17,23 @@ Sphinx resources:
 - http://www.sphinx-doc.org/en/master/usage/restructuredtext/directives.html
 - http://www.sphinx-doc.org/en/master/usage/restructuredtext/field-lists.html
 - http://www.sphinx-doc.org/en/master/usage/restructuredtext/domains.html
+
+Text is rendered by `RstEngine`, which sets docutils up once per thread
+rather than once per docstring as `docutils.core.publish_parts` does.
 """
 
-from docutils import core, nodes
+import copy
+import threading
+
+from docutils import core, io, nodes
+from docutils.readers.standalone import Reader
 from docutils.writers.html4css1 import Writer
 from docutils.parsers.rst import (
-    directives, roles, Directive
+    directives, roles, Directive, Parser
 )
 
+from . import highlight
+
 
 class DummyDirective(Directive):
     """Generic directive that does nothing."""
@@ -118,13 +127,60 @@ def emphasis(role, rawtext, text, lineno, inliner, options={}, content=[]):
     return [node], []
 
 
+class RstEngine:
+    """Long-lived reStructuredText to HTML converter.
+
+    Components are instantiated and settings (command line defaults and
+    configuration files) are processed once. Each `render` call still gets a
+    fresh document, with its own copy of the settings, so that nothing
+    (reporter, ids, footnotes, ...) leaks from one text to the next.
+
+    An engine isn't thread-safe, see `get_engine`.
+    """
+    def __init__(self):
+        self.publisher = core.Publisher(
+            Reader(), Parser(), Writer(),
+            source_class=io.StringInput, destination_class=io.StringOutput
+        )
+
+        # Only the fragment is used: don't read stylesheets for every text.
+        self.publisher.process_programmatic_settings(
+            None, {'embed_stylesheet': False}, None
+        )
+
+        self.settings = self.publisher.settings
+
+    def render(self, text):
+        """Render text to an HTML fragment."""
+        publisher = self.publisher
+
+        publisher.settings = copy.copy(self.settings)
+        publisher.settings.syntax_highlight = (
+            'long' if highlight.enabled else 'none'
+        )
+        publisher.set_source(text)
+        publisher.set_destination()
+        publisher.publish()
+
+        return publisher.writer.parts['fragment']
+
+
+local = threading.local()
+
+
+def get_engine():
+    """Get the `RstEngine` of the current thread."""
+    try:
+        return local.engine
+    except AttributeError:
+        local.engine = RstEngine()
+
+    return local.engine
+
+
 def format_rst(text):
     """Format reStructuredText text to HTML."""
-    parts = core.publish_parts(
-        text, writer=Writer()
-    )
-
-    return parts['fragment']
+    return get_engine().render(text)
 
 
 directives.register_directive('autoclass', DummyDirective)
@@ -4,51 +4,114 @@ This module provides an HTTP server exclusively for the purpose of serving HTML
 documentation over HTTP.
 """
 
+import os
+import shutil
 import logging
+import tempfile
 
 from http import server
 
-from .writers.html import make_html
+from .cache import RenderCache
+from .errors import FatalError
+from .formats import highlight
+from .watcher import make_watcher
+from .writers.html import get_cache_directory, render_html, write_stylesheet
 
 logger = logging.getLogger(__name__)
 
 
+HTML_TYPE = 'text/html; charset=utf-8'
+
+CSS_TYPE = 'text/css; charset=utf-8'
+
+# Stylesheets are named after their contents and never change.
+IMMUTABLE_HEADERS = [
+    ('Cache-Control', 'public, max-age=31536000, immutable'),
+    ('Vary', 'Accept-Encoding'),
+]
+
+
 class RequestHandler(server.BaseHTTPRequestHandler):
     """Documentation HTTP request handler.
 
     It will serve HTML documentation for the project at `project_path`. A
     documentation server will only accept `HEAD` and `GET` requests and reply
-    with 404s for any request that's not made on `/`.
+    with 404s for any request that's not made on `/` or on an external
+    stylesheet.
     """
-    def send_headers(self):
-        self.send_response(200 if self.path == '/' else 404)
-        self.send_header('Content-type', 'text/html')
+    def send_headers(self, code, length=None, content_type=HTML_TYPE,
+                     headers=()):
+        self.send_response(code)
+        self.send_header('Content-type', content_type)
+
+        for name, value in headers:
+            self.send_header(name, value)
+
+        if length is not None:
+            self.send_header('Content-Length', str(length))
+
         self.end_headers()
 
+    def send_file(self, path, body=True, content_type=HTML_TYPE, headers=()):
+        with open(path, 'rb') as fh:
+            self.send_headers(
+                200, os.fstat(fh.fileno()).st_size, content_type, headers
+            )
+
+            if body:
+                shutil.copyfileobj(fh, self.wfile)
+
+    def accepts_gzip(self):
+        encodings = self.headers.get('Accept-Encoding', '')
+
+        return 'gzip' in [
+            encoding.split(';')[0].strip() for encoding in encodings.split(',')
+        ]
+
+    def respond(self, body=True):
+        name = self.path[1:]
+
+        if name in self.server.stylesheets:
+            self.respond_stylesheet(name, body)
+        elif self.path == '/':
+            self.respond_page(body)
+        else:
+            self.send_headers(404)
+
+    def respond_page(self, body=True):
+        try:
+            snapshot = self.server.build()
+        except FatalError as err:
+            err.log()
+            self.send_headers(500)
+            return
+        except Exception:
+            logger.exception('uncaught exception while building')
+            self.send_headers(500)
+            return
+
+        self.send_file(snapshot, body)
+
+    def respond_stylesheet(self, name, body=True):
+        path = os.path.join(self.server.directory, name)
+        headers = IMMUTABLE_HEADERS
+
+        if self.accepts_gzip():
+            path += '.gz'
+            headers = headers + [('Content-Encoding', 'gzip')]
+
+        self.send_file(path, body, CSS_TYPE, headers)
+
     def do_HEAD(self):
         """Respond to `HEAD` requests."""
-        self.send_headers()
+        self.respond(body=False)
 
     def do_GET(self):
         """Respond to `GET` requests.
 
         Only `/` will be served, other paths will result in 404s.
         """
-        self.send_headers()
-
-        docstrings_format = self.server.docstrings_format
-        strip_docstrings = self.server.strip_docstrings
-
-        if self.path == '/':
-            project = self.server.parser.parse()
-
-            contents = make_html(
-                project, docstrings_format, strip_docstrings
-            )
-
-            self.wfile.write(
-                contents.encode('utf-8')
-            )
+        self.respond()
 
     def log_message(self, format, *args):
         requestline, code, size = args
@@ -64,13 +127,93 @@ class Server(server.HTTPServer):
     """Documentation HTTP server.
 
     It will reponde to HTTP requests using `RequestHandler`.
+
+    The project is parsed and rendered once, into a snapshot file which is
+    then streamed to clients.
+    Files are watched for changes: modified modules and documents are patched
+    into the retained project and only then is the HTML rendered again.
+    Rendered docstrings are kept across builds in `render_cache`.
+    With `external_css`, pages link to a stylesheet served with long-lived
+    cache headers rather than inlining it.
     """
     def __init__(self, host, port, parser, docstrings_format,
-                 strip_docstrings):
+                 strip_docstrings, render_cache=None, external_css=False):
         self.parser = parser
         self.docstrings_format = docstrings_format
         self.strip_docstrings = strip_docstrings
+        self.render_cache = render_cache or RenderCache()
+        self.external_css = external_css
+
+        self.project = None
+        self.snapshot = None
+        self.stylesheets = set()
+        self.directory = tempfile.mkdtemp(prefix='adoc-')
+
+        self.watcher = make_watcher(
+            parser.path, [
+                os.path.join(parser.path, document)
+                for document in parser.documents
+            ]
+        )
 
         super().__init__(
             (host, port), RequestHandler
         )
+
+    def build(self):
+        """Return the path of the HTML snapshot, rebuilding it if files have
+        changed.
+
+        Each build goes to a new file, requests being served from the previous
+        one can complete.
+        """
+        changes = self.watcher.changes()
+
+        if self.project is not None and changes is not None and not changes:
+            return self.snapshot
+
+        fd, path = tempfile.mkstemp(suffix='.html', dir=self.directory)
+
+        try:
+            with open(fd, 'w', encoding='utf-8') as fh:
+                if self.project is None \
+                        or not self.parser.update(self.project, changes):
+                    logger.debug('parsing project')
+                    self.project = self.parser.parse()
+
+                stylesheet = None
+
+                if self.external_css:
+                    stylesheet = write_stylesheet(
+                        self.directory, get_cache_directory(self.render_cache)
+                    )
+
+                    # Earlier stylesheets are kept for pages already served.
+                    self.stylesheets.add(stylesheet)
+                    stylesheet = '/' + stylesheet
+
+                render_html(
+                    fh, self.project, self.docstrings_format,
+                    self.strip_docstrings, self.render_cache, self.parser.jobs,
+                    stylesheet
+                )
+        except Exception:
+            self.project = None
+            os.remove(path)
+            raise
+        finally:
+            self.render_cache.close()
+            highlight.close()
+
+        if self.snapshot:
+            os.remove(self.snapshot)
+
+        self.snapshot = path
+
+        return self.snapshot
+
+    def server_close(self):
+        super().server_close()
+        self.watcher.close()
+
+        shutil.rmtree(self.directory, ignore_errors=True)
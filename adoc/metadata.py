@@ -0,0 +1,381 @@
+"""Project metadata extraction.
+
+Metadata is read statically from `pyproject.toml`, `setup.cfg` and the literal
+keyword arguments of the `setup()` call in `setup.py`, in that order of
+precedence (later files override earlier ones).
+
+`setup.py` is only executed when some of the metadata `adoc` relies on can't be
+read statically; this happens in a subprocess, with a timeout.
+"""
+
+import os
+import ast
+import sys
+import json
+import logging
+import tempfile
+import subprocess
+import configparser
+
+logger = logging.getLogger(__name__)
+
+
+CONFIG_FILES = [
+    'setup.py',
+    'setup.cfg',
+    'pyproject.toml',
+]
+
+METADATA_KEYS = [
+    'name',
+    'version',
+    'description',
+    'author',
+    'author_email',
+    'maintainer',
+    'maintainer_email',
+    'license',
+    'url',
+    'project_urls',
+    'packages',
+    'package_dir',
+    'scripts',
+]
+
+SETUP_TIMEOUT = 30
+
+LITERAL_ERRORS = (ValueError, TypeError, SyntaxError, RecursionError)
+
+# Keys `adoc` can do without when they are computed, as with
+# `packages=find_packages()`: packages are then discovered instead.
+DISCOVERED_KEYS = [
+    'packages',
+    'package_dir',
+]
+
+SETUP_RUNNER = '''
+import json
+import sys
+
+import setuptools
+
+output = sys.argv[1]
+calls = []
+
+
+def setup(**kwargs):
+    calls.append(kwargs)
+
+
+setuptools.setup = setup
+
+try:
+    import distutils.core
+    distutils.core.setup = setup
+except ImportError:
+    pass
+
+sys.argv = ['setup.py']
+
+with open('setup.py') as fh:
+    code = compile(fh.read(), 'setup.py', 'exec')
+
+exec(code, {'__name__': '__main__', '__file__': 'setup.py'})
+
+metadata = {}
+for key, value in (calls[0] if calls else {}).items():
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        continue
+
+    metadata[key] = value
+
+with open(output, 'w') as fh:
+    json.dump(metadata, fh)
+'''
+
+
+def split_list(value):
+    """Split a `setup.cfg` list, which is either comma or line separated."""
+    separator = '\n' if '\n' in value.strip() else ','
+
+    return [
+        item.strip() for item in value.split(separator) if item.strip()
+    ]
+
+
+def split_dict(value):
+    """Split a `setup.cfg` dangling dict (`key = value` lines)."""
+    items = {}
+
+    for line in value.splitlines():
+        key, sep, value = line.partition('=')
+
+        if sep:
+            items[key.strip()] = value.strip()
+
+    return items
+
+
+def find_setup_call(root):
+    """Find the `setup()` call of a `setup.py` AST."""
+    for node in ast.walk(root):
+        if not isinstance(node, ast.Call):
+            continue
+
+        func = node.func
+
+        if isinstance(func, ast.Name) and func.id == 'setup':
+            return node
+
+        if isinstance(func, ast.Attribute) and func.attr == 'setup':
+            return node
+
+    return None
+
+
+def read_setup_py(path='setup.py'):
+    """Read literal `setup()` keyword arguments from `setup.py`.
+
+    Module-level names bound to literals are resolved, and `DISCOVERED_KEYS`
+    computed by calls are left out. This returns the metadata and the list of
+    relevant keys that could not be read statically, or `None` instead of that
+    list when there's no `setup()` call to read.
+    """
+    with open(path) as fh:
+        root = ast.parse(fh.read())
+
+    names = {}
+    for node in root.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+
+        if not isinstance(node.targets[0], ast.Name):
+            continue
+
+        try:
+            names[node.targets[0].id] = ast.literal_eval(node.value)
+        except LITERAL_ERRORS:
+            names.pop(node.targets[0].id, None)
+
+    call = find_setup_call(root)
+    if call is None:
+        return {}, None
+
+    metadata = {}
+    unresolved = []
+
+    for keyword in call.keywords:
+        if keyword.arg is None:
+            return metadata, METADATA_KEYS  # `**kwargs`, anything goes
+
+        value = keyword.value
+
+        try:
+            if isinstance(value, ast.Name) and value.id in names:
+                metadata[keyword.arg] = names[value.id]
+            else:
+                metadata[keyword.arg] = ast.literal_eval(value)
+        except LITERAL_ERRORS:
+            if keyword.arg in DISCOVERED_KEYS \
+                    and isinstance(value, ast.Call):
+                continue
+
+            if keyword.arg in METADATA_KEYS:
+                unresolved.append(keyword.arg)
+
+    return metadata, unresolved
+
+
+def read_setup_cfg(path='setup.cfg'):
+    """Read metadata from `setup.cfg`."""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
+
+    metadata = {}
+
+    if config.has_section('metadata'):
+        section = config['metadata']
+
+        for key in METADATA_KEYS:
+            if key in section and key != 'project_urls':
+                metadata[key] = section[key]
+
+        if 'home_page' in section and 'url' not in metadata:
+            metadata['url'] = section['home_page']
+
+        if 'project_urls' in section:
+            metadata['project_urls'] = split_dict(section['project_urls'])
+
+        version = metadata.get('version', '')
+        if version.startswith('file:'):
+            try:
+                with open(version[5:].strip()) as fh:
+                    metadata['version'] = fh.read().strip()
+            except OSError:
+                logger.debug(
+                    'unable to read version from {}'.format(
+                        version[5:].strip()
+                    )
+                )
+
+                del metadata['version']
+        elif version.startswith('attr:'):
+            del metadata['version']
+
+        if metadata.get('description', '').startswith('file:'):
+            del metadata['description']
+
+    if config.has_section('options'):
+        section = config['options']
+
+        if 'packages' in section \
+                and not section['packages'].strip().startswith('find'):
+            metadata['packages'] = split_list(section['packages'])
+
+        if 'package_dir' in section:
+            package_dir = section['package_dir'].strip()
+
+            if package_dir.startswith('='):
+                metadata['package_dir'] = {'': package_dir[1:].strip()}
+            else:
+                metadata['package_dir'] = split_dict(package_dir)
+
+        if 'scripts' in section:
+            metadata['scripts'] = split_list(section['scripts'])
+
+    return metadata
+
+
+def load_toml(path):
+    """Load a TOML file, returning `None` when no TOML parser is available."""
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            logger.debug(
+                'skipping {}, reading it requires Python 3.11+ or `tomli`'
+                .format(path)
+            )
+
+            return None
+
+    with open(path, 'rb') as fh:
+        return tomllib.load(fh)
+
+
+def read_pyproject(path='pyproject.toml'):
+    """Read PEP 621 metadata from `pyproject.toml`."""
+    data = load_toml(path) or {}
+
+    project = data.get('project', {})
+    setuptools = data.get('tool', {}).get('setuptools', {})
+
+    metadata = {}
+
+    for key in ('name', 'version', 'description'):
+        if key in project:
+            metadata[key] = project[key]
+
+    for key, people in (('author', 'authors'), ('maintainer', 'maintainers')):
+        names = [p['name'] for p in project.get(people, []) if 'name' in p]
+        emails = [p['email'] for p in project.get(people, []) if 'email' in p]
+
+        if names:
+            metadata[key] = ', '.join(names)
+
+        if emails:
+            metadata[key + '_email'] = ', '.join(emails)
+
+    license = project.get('license')
+    if isinstance(license, dict) and 'text' in license:
+        metadata['license'] = license['text']
+    elif isinstance(license, str):
+        metadata['license'] = license
+
+    urls = project.get('urls')
+    if urls:
+        metadata['project_urls'] = dict(urls)
+
+        for key, value in urls.items():
+            if key.lower() in ('homepage', 'home', 'home-page'):
+                metadata['url'] = value
+
+    if isinstance(setuptools.get('packages'), list):
+        metadata['packages'] = setuptools['packages']
+
+    if 'package-dir' in setuptools:
+        metadata['package_dir'] = setuptools['package-dir']
+
+    return metadata
+
+
+def run_setup_py(timeout=SETUP_TIMEOUT):
+    """Execute `setup.py` in a subprocess and return `setup()` arguments.
+
+    Only JSON-serializable arguments are returned.
+    """
+    fd, output = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+
+    try:
+        subprocess.run(  # nosec: running setup.py is the whole point
+            [sys.executable, '-c', SETUP_RUNNER, output],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+            check=True
+        )
+
+        with open(output) as fh:
+            return json.load(fh)
+    except subprocess.TimeoutExpired:
+        logger.error(
+            '`setup.py` did not complete within {}s'.format(timeout)
+        )
+    except subprocess.CalledProcessError as err:
+        logger.error('unable to execute `setup.py`')
+        logger.debug(
+            'traceback:\n{}'.format(
+                err.stderr.decode('utf-8', 'replace').strip()
+            )
+        )
+    finally:
+        os.remove(output)
+
+    return {}
+
+
+def read_metadata(timeout=SETUP_TIMEOUT):
+    """Read project metadata in the current working directory."""
+    metadata = {}
+
+    if os.path.isfile('pyproject.toml'):
+        metadata.update(
+            read_pyproject()
+        )
+
+    if os.path.isfile('setup.cfg'):
+        metadata.update(
+            read_setup_cfg()
+        )
+
+    if os.path.isfile('setup.py'):
+        setup_metadata, unresolved = read_setup_py()
+
+        if unresolved is None or unresolved:
+            logger.debug(
+                'executing setup.py, static analysis failed on: {}'.format(
+                    ', '.join(unresolved or ['setup()'])
+                )
+            )
+
+            setup_metadata = run_setup_py(timeout) or setup_metadata
+
+        metadata.update(setup_metadata)
+
+    return metadata
@@ -5,17 +5,22 @@ source code.
 
 They are handled mostly while parsing a project's source code and later
 transmited to the HTML writer.
+
+Source code units use `__slots__` and interned strings to keep memory usage low
+on very large projects: mixins declare no slots of their own, concrete classes
+declare and initialize the attributes of all their mixins.
+
+Modules and projects keep aggregate counts of their tree up to date as atoms
+are added, so that emptiness checks and counts don't walk the tree.
 """
 
 import os
 import ast
+import sys
 
-from bs4 import BeautifulSoup
-
-from .formats import format_md, format_rst
-from .utils import memoized
+from .utils import cached_property, find_heading, invalidate
 from .codegen import (
-    make_python, make_signature
+    make_code, make_signature
 )
 
 
@@ -29,16 +34,49 @@ def walk(root, attr, max_depth=-1):
         yield from walk(item, attr, max_depth - 1)
 
 
+def propagate(node, functions=0, classes=0, modules=0):
+    """Update aggregate counts of a module tree, from `node` upwards.
+
+    `functions` and `classes` are added to the totals of `node` and all of its
+    ancestors, `modules` to the count of non-empty submodules of `node`; then
+    changes of emptiness are carried over to parents.
+    """
+    while isinstance(node, ModulesMixin):
+        was_empty = node.is_empty()
+
+        node.function_count += functions
+        node.class_count += classes
+        node.module_count += modules
+
+        modules = int(was_empty) - int(node.is_empty())
+
+        if not (functions or classes or modules):
+            return
+
+        node = node.parent
+
+
+def invalidate_symbols(node):
+    """Drop the symbol index of the project a module tree belongs to."""
+    while getattr(node, 'parent', None) is not None:
+        node = node.parent
+
+    if isinstance(node, Project):
+        node.invalidate()
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class Atom:
     """Lowest-level unit representing a source code unit."""
-    name = None
-    doc = None
-
-    parent = None
+    __slots__ = ('name', 'doc', 'parent', '_fully_qualified_name')
 
     def __init__(self, name, doc=None):
-        self.name = name
+        self.name = intern(name)
         self.doc = doc
+        self.parent = None
 
     def __str__(self):
         return '<{}:{}>'.format(self.type, self.name)
@@ -47,8 +85,7 @@ class Atom:
     def type(self):
         return self.__class__.__name__
 
-    @property
-    @memoized
+    @cached_property
     def fully_qualified_name(self):
         """Recursively generate an `Atom`'s fully qualified name."""
         if not self.parent or isinstance(self.parent, Project):
@@ -66,7 +103,7 @@ class Atom:
 
 class ParametersMixin:
     """Mixin for classes that hold parameters."""
-    parameters = None
+    __slots__ = ()
 
     def add_parameters(self, parameters):
         """Add parameters representation (ie. `str`)."""
@@ -74,13 +111,13 @@ class ParametersMixin:
             self.parameters = []
 
         self.parameters.extend(
-            parameters
+            intern(parameter) for parameter in parameters
         )
 
 
 class DecoratorsMixin:
     """Mixin for classes that hold decorators."""
-    decorators = None
+    __slots__ = ()
 
     def add_decorators(self, decorators):
         """Add decorators, (ie. `str`)."""
@@ -88,13 +125,13 @@ class DecoratorsMixin:
             self.decorators = []
 
         self.decorators.extend(
-            decorators
+            intern(decorator) for decorator in decorators
         )
 
 
 class FunctionsMixin:
     """Mixin for classes that hold `Function` instances."""
-    functions = None
+    __slots__ = ()
 
     def is_empty(self):
         return not self.functions
@@ -108,21 +145,36 @@ class FunctionsMixin:
 
         self.functions.append(function)
 
+        propagate(self, functions=1)
+
 
 class Function(ParametersMixin, DecoratorsMixin, Atom):
     """Representation of a function."""
+    __slots__ = ('parameters', 'decorators')
+
+    def __init__(self, name, doc=None):
+        super().__init__(
+            name, doc
+        )
+
+        self.parameters = None
+        self.decorators = None
+
     @classmethod
-    def from_ast(cls, node):
-        """Build a `Function` instance from an AST node."""
+    def from_ast(cls, node, source=None):
+        """Build a `Function` instance from an AST node.
+
+        Decorators and parameters are sliced from `source`, if given.
+        """
         doc = ast.get_docstring(node)
         function = cls(node.name, doc)
 
         function.add_decorators(
-            make_python(decorator) for decorator in node.decorator_list
+            make_code(decorator, source) for decorator in node.decorator_list
         )
 
         function.add_parameters(
-            make_signature(node.args)
+            make_signature(node.args, source)
         )
 
         return function
@@ -130,7 +182,7 @@ class Function(ParametersMixin, DecoratorsMixin, Atom):
 
 class ClassesMixin:
     """Mixin for classes that hold `Class` instances."""
-    classes = None
+    __slots__ = ()
 
     def is_empty(self):
         return not self.classes
@@ -144,56 +196,69 @@ class ClassesMixin:
 
         self.classes.append(klass)
 
+        propagate(self, classes=1)
+
 
 class Class(DecoratorsMixin, FunctionsMixin, Atom):
     """Representation of a class."""
-    bases = None
+    __slots__ = ('decorators', 'functions', 'bases')
+
+    def __init__(self, name, doc=None):
+        super().__init__(
+            name, doc
+        )
+
+        self.decorators = None
+        self.functions = None
+        self.bases = None
 
     def add_base(self, base):
         if self.bases is None:
             self.bases = []
 
         self.bases.append(
-            base
+            intern(base)
         )
 
     @classmethod
-    def from_ast(cls, node):
-        """Build a `Class` instance from an AST node."""
+    def from_ast(cls, node, source=None):
+        """Build a `Class` instance from an AST node.
+
+        Decorators and bases are sliced from `source`, if given.
+        """
         doc = ast.get_docstring(node)
         klass = cls(node.name, doc)
 
         klass.add_decorators(
-            make_python(decorator) for decorator in node.decorator_list
+            make_code(decorator, source) for decorator in node.decorator_list
         )
 
         for base in node.bases:
             klass.add_base(
-                make_python(base)
+                make_code(base, source)
             )
 
         for child in ast.iter_child_nodes(node):
             if isinstance(child, ast.FunctionDef):
                 klass.add_function(
-                    Function.from_ast(child)
+                    Function.from_ast(child, source)
                 )
 
         return klass
 
 
 class ModulesMixin:
-    """Mixin for classes that hold `Module` instances."""
-    modules = None
+    """Mixin for classes that hold `Module` instances.
 
-    def is_empty(self):
-        if not self.modules:
-            return True
-
-        for module in self.modules:
-            if not module.is_empty():
-                return False
+    Classes using this mixin maintain `function_count` and `class_count`, the
+    number of module-level functions and classes in their whole tree, and
+    `module_count`, the number of their non-empty submodules. Changing modules
+    drops the symbol index of the project (see `Project.symbols`).
+    """
+    __slots__ = ()
 
-        return True
+    def is_empty(self):
+        return not self.module_count
 
     def add_module(self, module):
         """Add a `Module` instance, setting `self` as its parent."""
@@ -204,34 +269,93 @@ class ModulesMixin:
 
         self.modules.append(module)
 
+        propagate(
+            self, module.function_count, module.class_count,
+            int(not module.is_empty())
+        )
+
+        invalidate_symbols(self)
+
+    def replace_module(self, old, new):
+        """Replace a `Module` instance in place, keeping its position."""
+        idx = self.modules.index(old)
+
+        old.parent = None
+        new.parent = self
+
+        self.modules[idx] = new
+
+        propagate(
+            self,
+            new.function_count - old.function_count,
+            new.class_count - old.class_count,
+            int(old.is_empty()) - int(new.is_empty())
+        )
+
+        invalidate_symbols(self)
+
+    def remove_module(self, module):
+        """Remove a `Module` instance, detaching it from `self`."""
+        self.modules.remove(module)
+
+        module.parent = None
+
+        propagate(
+            self, -module.function_count, -module.class_count,
+            -int(not module.is_empty())
+        )
+
+        invalidate_symbols(self)
+
 
 class Module(ModulesMixin, ClassesMixin, FunctionsMixin, Atom):
     """Representation of a module.
 
     No distinction is made between modules and packages.
     """
+    __slots__ = (
+        'modules', 'classes', 'functions',
+        'function_count', 'class_count', 'module_count'
+    )
+
+    def __init__(self, name, doc=None):
+        super().__init__(
+            name, doc
+        )
+
+        self.modules = None
+        self.classes = None
+        self.functions = None
+
+        self.function_count = 0
+        self.class_count = 0
+        self.module_count = 0
+
     def is_empty(self):
-        return FunctionsMixin.is_empty(self) and ClassesMixin.is_empty(self) \
-                and ModulesMixin.is_empty(self)
+        return not (self.function_count or self.class_count)
 
     def merge(self, module):
         self.doc = module.doc  # TODO Merge the rest as well
 
     @classmethod
-    def from_ast(cls, node, name):
-        """Build a `Module` instance from an AST node."""
+    def from_ast(cls, node, name, source=None):
+        """Build a `Module` instance from an AST node.
+
+        Code is sliced from `source` (a `codegen.Source`), if given, rather
+        than generated.
+        """
         doc = ast.get_docstring(node)
         module = Module(name, doc)
 
         for child in ast.iter_child_nodes(node):
             if isinstance(child, ast.ClassDef):
                 module.add_class(
-                    Class.from_ast(child)
+                    Class.from_ast(child, source)
                 )
 
             if isinstance(child, ast.FunctionDef):
                 module.add_function(
-                    Function.from_ast(child)
+                    Function.from_ast(child, source)
                 )
 
         return module
@@ -239,15 +363,21 @@ class Module(ModulesMixin, ClassesMixin, FunctionsMixin, Atom):
 
 class Project(ModulesMixin, Atom):
     """Representation of a project."""
-    name = None
-    metadata = None
-    documents = None
+    __slots__ = (
+        'modules', 'metadata', 'documents', '_symbols',
+        'function_count', 'class_count', 'module_count'
+    )
 
     def __init__(self, name, doc, metadata=None):
         super().__init__(
             name, doc
         )
 
+        self.modules = None
+
+        self.function_count = 0
+        self.class_count = 0
+        self.module_count = 0
         self.metadata = metadata or {}
         self.documents = []
 
@@ -264,7 +394,23 @@ class Project(ModulesMixin, Atom):
     def get_meta(self, key, default=None):
         return self.metadata.get(key, default) if self.metadata else default
 
+    def invalidate(self):
+        """Drop the symbol index, after modules changed in the tree."""
+        invalidate(self, 'symbols')
+
+    @cached_property
+    def symbols(self):
+        """Index of the project's atoms, built on first access.
+
+        The value of this property is cached until `invalidate` is called,
+        which adding, replacing or removing modules anywhere in the tree does.
+        """
+        return SymbolIndex(self)
+
     def iter_modules(self, max_depth=-1):
+        if max_depth == -1:
+            return list(self.symbols.modules)
+
         modules = []
         for module in walk(self, 'modules', max_depth=max_depth):
             if getattr(module, 'modules', None):
@@ -275,6 +421,9 @@ class Project(ModulesMixin, Atom):
         )
 
     def iter_functions(self, max_depth=-1):
+        if max_depth == -1:
+            return list(self.symbols.functions)
+
         functions = []
         for module in walk(self, 'modules', max_depth=max_depth):
             if getattr(module, 'functions', None):
@@ -285,6 +434,9 @@ class Project(ModulesMixin, Atom):
         )
 
     def iter_classes(self, max_depth=-1):
+        if max_depth == -1:
+            return list(self.symbols.classes)
+
         classes = []
         for module in walk(self, 'modules', max_depth=max_depth):
             if getattr(module, 'classes', None):
@@ -295,6 +447,66 @@ class Project(ModulesMixin, Atom):
         )
 
 
+class SymbolIndex:
+    """Index of a project's atoms by fully qualified name.
+
+    Modules, module-level functions and module-level classes are also kept in
+    sorted lists, in the order `Project.iter_*` returns them.
+    """
+    __slots__ = ('atoms', 'modules', 'functions', 'classes')
+
+    def __init__(self, project):
+        self.atoms = {}
+
+        modules = []
+        functions = []
+        classes = []
+
+        for module in walk(project, 'modules'):
+            if module is not project:
+                modules.append(module)
+
+            if getattr(module, 'functions', None):
+                functions += module.functions
+
+            if getattr(module, 'classes', None):
+                classes += module.classes
+
+        for atom in modules + functions:
+            self.atoms[atom.fully_qualified_name] = atom
+
+        for klass in classes:
+            self.atoms[klass.fully_qualified_name] = klass
+
+            for method in klass.functions or []:
+                self.atoms[method.fully_qualified_name] = method
+
+        self.modules = sorted(
+            modules, key=lambda m: m.fully_qualified_name
+        )
+
+        self.functions = sorted(
+            functions, key=lambda f: f.name
+        )
+
+        self.classes = sorted(
+            classes, key=lambda c: c.name
+        )
+
+    def __len__(self):
+        return len(self.atoms)
+
+    def __contains__(self, name):
+        return name in self.atoms
+
+    def __getitem__(self, name):
+        return self.atoms[name]
+
+    def get(self, name, default=None):
+        """Look an atom up by fully qualified name."""
+        return self.atoms.get(name, default)
+
+
 class Document:
     """Representation of a document.
 
@@ -310,13 +522,19 @@ class Document:
             os.path.basename(self.filename)
         )
 
-    @property
-    @memoized
+    def invalidate(self):
+        """Drop cached HTML and title, after the file changed."""
+        invalidate(self, 'html', 'title')
+
+    @cached_property
     def html(self):
         """Format a document to HTML.
 
-        The value of this property is cached for better performances.
+        The value of this property is cached until `Document.invalidate` is
+        called (the live server does when the file changes).
         """
+        from .formats import format_md, format_rst
+
         def format_html(x):
             return x
 
@@ -336,19 +554,19 @@ class Document:
                 fh.read()
             )
 
-    @property
-    @memoized
+    @cached_property
     def title(self):
         """Extract a document's title.
 
-        For this to be possible, it has first to formatted to HTML.
+        For this to be possible, it has first to formatted to HTML; the HTML is
+        then only parsed up to the first `h1` heading.
 
-        The value of this property is cached for better performances.
+        The value of this property is cached along with `html`, until
+        `Document.invalidate` is called.
         """
-        soup = BeautifulSoup(self.html, 'html.parser')
+        title = find_heading(self.html, 'h1')
 
-        headings = soup.find_all('h1')
-        if len(headings):
-            return ' '.join(headings[0].contents)
+        if title is not None:
+            return title
 
         return self.name
@@ -0,0 +1,256 @@
+"""Tokenize-based outline scanner.
+
+`Module.from_ast` only looks at top-level definitions, class bodies and
+docstrings, yet `ast.parse` builds a tree for every statement of a module. For
+very large modules (typically generated code), this scanner walks the token
+stream instead: only decorators and `def`/`class` headers are handed to
+`ast.parse`, one at a time, while bodies are skipped.
+
+Anything the scanner can't handle with certainty raises `Unsupported`, in which
+case `parse_outline` falls back to parsing the whole module.
+"""
+
+import io
+import ast
+import inspect
+import logging
+import tokenize
+
+from .codegen import Source
+from .models import Module, Class, Function
+
+logger = logging.getLogger(__name__)
+
+
+SKIPPED_TOKENS = {
+    tokenize.COMMENT,
+    tokenize.NL,
+    tokenize.ENCODING,
+}
+
+OPENING_BRACKETS = {'(', '[', '{'}
+CLOSING_BRACKETS = {')', ']', '}'}
+
+
+class Unsupported(Exception):
+    """Raised when the scanner meets a construct it can't handle."""
+
+
+def logical_lines(contents):
+    """Yield the `(depth, tokens)` logical lines an outline is made of.
+
+    Tokens are streamed and only kept for top-level lines, lines of class
+    bodies, and the first line of their bodies (where docstrings are):
+    function bodies are dropped as they are read.
+    """
+    depth = line_depth = 0
+    tokens = None
+
+    in_class = False
+    after_header = False
+
+    readline = io.StringIO(contents).readline
+
+    for token in tokenize.generate_tokens(readline):
+        if token.type == tokenize.INDENT:
+            depth += 1
+        elif token.type == tokenize.DEDENT:
+            depth -= 1
+        elif token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            if tokens:
+                yield line_depth, tokens
+
+            if tokens is not None:
+                # Lines at the top level or in a class body are where
+                # definitions are, their bodies may start with docstrings.
+                after_header = line_depth == 0 \
+                    or line_depth == 1 and in_class
+
+                if line_depth == 0:
+                    in_class = is_keyword(tokens[0], 'class')
+            else:
+                after_header = False
+
+            tokens = None
+        elif token.type not in SKIPPED_TOKENS:
+            if tokens is None:
+                line_depth = depth
+
+                if depth == 0 or depth == 1 and in_class or after_header:
+                    tokens = []
+                else:
+                    after_header = False
+
+            if tokens is not None:
+                tokens.append(token)
+
+
+def is_keyword(token, *keywords):
+    return token.type == tokenize.NAME and token.string in keywords
+
+
+def find_colon(tokens):
+    """Find the index of the colon ending a `def` or `class` header."""
+    brackets = 0
+
+    for idx, token in enumerate(tokens):
+        if token.type != tokenize.OP:
+            if not brackets and is_keyword(token, 'lambda'):
+                raise Unsupported('lambda in header')
+
+            continue
+
+        if token.string in OPENING_BRACKETS:
+            brackets += 1
+        elif token.string in CLOSING_BRACKETS:
+            brackets -= 1
+        elif token.string == ':' and not brackets:
+            return idx
+
+    raise Unsupported('unterminated header')
+
+
+def make_docstring(tokens):
+    """Extract a docstring from the tokens of a statement, if it is one."""
+    if not tokens:
+        return None
+
+    if any(token.type == tokenize.OP and token.string == ';'
+           for token in tokens):
+        raise Unsupported('compound statement')
+
+    if tokens[0].type == tokenize.OP and tokens[0].string == '(':
+        raise Unsupported('parenthesized statement')
+
+    if any(token.type != tokenize.STRING for token in tokens):
+        return None
+
+    for token in tokens:
+        prefix = token.string[:token.string.find(token.string[-1])]
+        if set(prefix.lower()) & {'b', 'f'}:
+            raise Unsupported('non-text docstring')
+
+    doc = ast.literal_eval(
+        ' '.join(token.string for token in tokens)
+    )
+
+    return inspect.cleandoc(doc)
+
+
+class Scanner:
+    """Extract a `Module` from source code without building its full AST."""
+    def __init__(self, contents, source_signatures=False):
+        self.source_lines = contents.splitlines(True)
+        self.lines = list(logical_lines(contents))
+        self.source_signatures = source_signatures
+
+    def segment(self, start, end):
+        """Extract source text between two token positions."""
+        (start_row, start_col), (end_row, end_col) = start, end
+
+        if start_row == end_row:
+            return self.source_lines[start_row - 1][start_col:end_col]
+
+        return ''.join(
+            [self.source_lines[start_row - 1][start_col:]]
+            + self.source_lines[start_row:end_row - 1]
+            + [self.source_lines[end_row - 1][:end_col]]
+        )
+
+    def body_docstring(self, idx, colon):
+        """Extract the docstring of the header at `idx`."""
+        depth, tokens = self.lines[idx]
+
+        if colon + 1 < len(tokens):
+            return make_docstring(tokens[colon + 1:])
+
+        if idx + 1 >= len(self.lines) or self.lines[idx + 1][0] != depth + 1:
+            raise Unsupported('missing body')
+
+        return make_docstring(
+            self.lines[idx + 1][1]
+        )
+
+    def make_atom(self, cls, decorators, idx):
+        """Build a `Function` or `Class` from decorators and a header."""
+        depth, tokens = self.lines[idx]
+        colon = find_colon(tokens)
+
+        snippet = [
+            self.segment(line[0].start, line[-1].end)
+            for line in decorators
+        ]
+
+        snippet.append(
+            self.segment(tokens[0].start, tokens[colon].end) + ' pass'
+        )
+
+        snippet = '\n'.join(snippet) + '\n'
+        root = ast.parse(snippet)
+
+        atom = cls.from_ast(
+            root.body[0], Source(snippet) if self.source_signatures else None
+        )
+        atom.doc = self.body_docstring(idx, colon)
+
+        return atom
+
+    def scan(self, name):
+        module = Module(name)
+
+        if not self.lines:
+            return module
+
+        if self.lines[0][0] != 0:
+            raise Unsupported('unexpected indentation')
+
+        module.doc = make_docstring(self.lines[0][1])
+
+        klass = None
+        decorators = []
+
+        for idx, (depth, tokens) in enumerate(self.lines):
+            if depth == 0:
+                klass = None
+            elif depth > 1 or klass is None:
+                decorators = []
+                continue
+
+            first = tokens[0]
+
+            if first.type == tokenize.OP and first.string == '@':
+                decorators.append(tokens)
+                continue
+
+            if is_keyword(first, 'def'):
+                function = self.make_atom(Function, decorators, idx)
+
+                if depth:
+                    klass.add_function(function)
+                else:
+                    module.add_function(function)
+            elif is_keyword(first, 'class') and not depth:
+                klass = self.make_atom(Class, decorators, idx)
+                module.add_class(klass)
+
+            decorators = []
+
+        return module
+
+
+def parse_outline(contents, name, source_signatures=False):
+    """Build a `Module` through the outline scanner.
+
+    The whole module is parsed with `ast.parse` if the scanner fails.
+    """
+    try:
+        return Scanner(contents, source_signatures).scan(name)
+    except (Unsupported, SyntaxError, tokenize.TokenError) as err:
+        logger.debug(
+            'outline scanner fallback for {}: {}'.format(name, err)
+        )
+
+    return Module.from_ast(
+        ast.parse(contents), name,
+        Source(contents) if source_signatures else None
+    )
@@ -2,12 +2,14 @@
 
 import os
 import ast
-import unittest.mock
-import setuptools
-import importlib
-import fnmatch
+import copy
 import logging
+import functools
 
+from .cache import file_digest, file_fingerprint
+from .codegen import Source
+from .discovery import Discovery
+from .metadata import CONFIG_FILES, read_metadata
 from .utils import WorkingDirectory
 from .models import (
     Project, Module, Document
@@ -35,17 +37,72 @@ DEFAULT_EXCLUDE = [
 ]
 
 
+def parse_file(path, name, strip_ext=True, outline=None,
+               source_signatures=False):
+    """Parse a Python file into a `Module`.
+
+    Files of at least `outline` characters go through the outline scanner
+    rather than being fully parsed. With `source_signatures`, decorators,
+    parameters and bases are sliced from the source code, as written.
+    """
+    with open(path) as fh:
+        contents = fh.read()
+
+    if strip_ext:
+        name, ext = os.path.splitext(name)
+
+    if outline is not None and len(contents) >= outline:
+        from .outline import parse_outline
+
+        return parse_outline(contents, name, source_signatures)
+
+    root = ast.parse(contents)
+
+    return Module.from_ast(
+        root, name, Source(contents) if source_signatures else None
+    )
+
+
+def parse_job(job, outline=None, source_signatures=False):
+    """Parse a `(path, name, strip_ext)` job, capturing syntax errors.
+
+    This runs in worker processes when parsing in parallel: only the extracted
+    `Module` (or the error) is sent back, never the AST.
+    """
+    try:
+        return parse_file(
+            *job, outline=outline, source_signatures=source_signatures
+        ), None
+    except SyntaxError as err:
+        return None, err
+
+
 class ProjectParser:
     module = None
 
     def __init__(self, path, overrides, no_setup=False, exclude=None,
-                 find_packages=False, documents=None):
+                 find_packages=False, documents=None, jobs=1, cache=None,
+                 outline=None, gitignore=True, source_signatures=False):
         self.path = path
         self.overrides = overrides
         self.no_setup = no_setup
         self.find_packages = find_packages
         self.exclude = exclude or DEFAULT_EXCLUDE
         self.documents = documents or []
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache = cache
+        self.outline = outline
+        self.gitignore = gitignore
+        self.source_signatures = source_signatures
+
+        self.metadata_cache = {}
+
+        # Where files and modules were placed during the last `parse`, so
+        # that `update` may patch a project in place.
+        self.sources = {}
+        self.modules = {}
+        self.package_paths = set()
+        self.document_paths = {}
 
     def parse(self):
         """Parse a project, setting the current working directiory."""
@@ -61,7 +118,7 @@ class ProjectParser:
         metadata = {}
 
         if not self.no_setup and self.setup_exists():
-            logger.debug('loading setup.py')
+            logger.debug('loading project metadata')
 
             metadata.update(
                 self.load_setup()
@@ -80,12 +137,35 @@ class ProjectParser:
                 os.path.realpath(self.path)
             )
 
+        discovery = Discovery(
+            '.', self.exclude, gitignore=self.gitignore
+        )
+
         if 'packages' not in metadata or self.find_packages:
             logger.debug('guessing packages')
-            metadata['packages'] = setuptools.find_packages(
-                metadata['package_dir'].get('', ''), exclude=self.exclude
+            packages = discovery.find_packages(
+                metadata['package_dir'].get('') or '.'
             )
 
+            metadata['packages'] = [package for package, path, _ in packages]
+        else:
+            packages = []
+
+            for package in metadata['packages']:
+                parts = package.split('.')
+                dir = metadata['package_dir'].get(
+                    package, metadata['package_dir'].get('')
+                )
+
+                package_path = os.path.join(dir, *parts)
+
+                if not os.path.isdir(package_path):
+                    continue
+
+                packages.append(
+                    (package, package_path, discovery.list_files(package_path))
+                )
+
         readme = self.find_readme()
         if readme:
             logger.debug(
@@ -96,55 +176,191 @@ class ProjectParser:
 
         project = Project(metadata['name'], readme, metadata)
 
+        self.sources = {}
+        self.modules = {}
+        self.package_paths = {
+            os.path.abspath('.'),
+            os.path.abspath(metadata['package_dir'].get('', '.'))
+        }
+        self.document_paths = {}
+
+        if readme:
+            self.document_paths[readme.filename] = None
+
         for document in self.documents:
             logger.debug(
                 'adding document {}'.format(document)
             )
 
-            project.add_document(
-                Document(document)
+            document = Document(document)
+
+            self.document_paths[document.filename] = len(project.documents)
+
+            project.add_document(document)
+
+        scripts = metadata.get('scripts', [])
+
+        jobs = [(script, script, False) for script in scripts]
+        for package, package_path, files in packages:
+            self.package_paths.add(
+                os.path.abspath(package_path)
             )
 
-        for script in metadata.get('scripts', []):
+            jobs.extend(
+                (path, item, True) for path, item in files
+            )
+
+        results = iter(
+            self.parse_files(jobs)
+        )
+
+        for script in scripts:
             logger.debug(
                 'parsing script {}'.format(script)
             )
 
-            try:
-                module = self.parse_file(script, script, strip_ext=False)
-            except SyntaxError:
+            module, error = next(results)
+
+            if error:
                 logger.error(
                     '{} does not appear to be a Python script'.format(script)
                 )
 
                 continue
 
-            if not module.is_empty():
-                project.add_module(
-                    module
-                )
+            self.place(project, (script, script, False), module)
 
-        for package in metadata.get('packages', []):
+        for package, package_path, files in packages:
             logger.debug(
                 'parsing package {}'.format(package)
             )
 
-            parts = package.split('.')
-            dir = metadata['package_dir'].get(
-                package, metadata['package_dir'].get('')
+            current_module = Module(package)
+
+            for path, item in files:
+                module, error = next(results)
+
+                if error:
+                    raise error
+
+                self.place(current_module, (path, item, True), module)
+
+            if not current_module.is_empty():
+                project.add_module(current_module)
+
+        return project
+
+    def place(self, container, job, module):
+        """Add a parsed module to its container, recording where it went."""
+        path = os.path.abspath(job[0])
+        old = self.modules.get(path)
+
+        if module.is_empty():
+            module = None
+
+        if old and module:
+            container.replace_module(old, module)
+        elif old:
+            container.remove_module(old)
+        elif module:
+            container.add_module(module)
+
+        self.sources[path] = container, job
+        self.modules[path] = module
+
+    def update(self, project, paths):
+        """Patch a project previously returned by `parse` in place.
+
+        `paths` are absolute paths of changed files. Modified source files are
+        re-parsed and swapped into `project`, modified documents are reloaded.
+        This returns `False` when a full `parse` is required instead (unknown
+        changes, created or deleted files, project configuration changes).
+        """
+        if paths is None:
+            return False
+
+        with WorkingDirectory(self.path):
+            return self.update_project(project, paths)
+
+    def update_project(self, project, paths):
+        jobs = []
+        documents = []
+
+        root = os.path.abspath('.') + os.sep
+
+        for path in sorted(paths):
+            exists = os.path.exists(path)
+
+            if path in self.sources:
+                if not exists:
+                    return False
+
+                jobs.append(
+                    self.sources[path][1]
+                )
+            elif path in self.document_paths:
+                if not exists:
+                    return False
+
+                documents.append(path)
+            elif path.startswith(root) \
+                    or os.path.dirname(path) in self.package_paths:
+                # Any other source file may belong to a new package, and
+                # `.gitignore` files change which files are documented.
+                if path.endswith('.py') \
+                        or os.path.basename(path) == '.gitignore':
+                    return False
+
+                if os.path.dirname(path) in self.package_paths:
+                    if os.path.basename(path) in CONFIG_FILES:
+                        return False
+
+                    if os.path.isdir(path):
+                        return False
+
+        for path in documents:
+            logger.debug(
+                'reloading document {}'.format(path)
             )
 
-            package_path = os.path.join(dir, *parts)
+            idx = self.document_paths[path]
+            if idx is None:
+                project.doc.invalidate()
+            else:
+                project.documents[idx].invalidate()
+
+        containers = []
+
+        for job, (module, error) in zip(jobs, self.parse_files(jobs)):
+            logger.debug(
+                'reparsing {}'.format(job[0])
+            )
+
+            if error:
+                logger.error(
+                    'unable to parse {}: {}'.format(job[0], error)
+                )
 
-            if not os.path.isdir(package_path):
                 continue
 
-            module = self.parse_module(package_path, package)
+            container, job = self.sources[os.path.abspath(job[0])]
+            self.place(container, job, module)
 
-            if not module.is_empty():
-                project.add_module(module)
+            if container not in containers:
+                containers.append(container)
 
-        return project
+        for container in containers:
+            if container is project:
+                continue
+
+            if container.is_empty() and container.parent is project:
+                project.remove_module(container)
+            elif not container.is_empty() and container.parent is None:
+                project.add_module(container)
+
+        project.invalidate()
+
+        return True
 
     def find_readme(self):
         """Parse a README file in the current working directory."""
@@ -157,62 +373,123 @@ class ProjectParser:
         return None
 
     def setup_exists(self):
-        return os.path.isfile('setup.py')
+        return any(
+            os.path.isfile(filename) for filename in CONFIG_FILES
+        )
 
     def load_setup(self):
-        """Parse a `setup.py` file in the current working directory."""
-        with unittest.mock.patch.object(setuptools, 'setup') as mock_setup:
-            spec = importlib.util.spec_from_file_location('setup', 'setup.py')
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+        """Load project metadata in the current working directory.
+
+        Metadata is cached against the hashes of the configuration files
+        (`setup.py`, `setup.cfg` and `pyproject.toml`).
+        """
+        key = (os.path.abspath('.'),) + tuple(
+            (filename, file_digest(filename))
+            for filename in CONFIG_FILES if os.path.isfile(filename)
+        )
 
-        args, kwargs = mock_setup.call_args
+        if key not in self.metadata_cache:
+            self.metadata_cache[key] = read_metadata()
+        else:
+            logger.debug('using cached project metadata')
 
-        return kwargs
+        return copy.deepcopy(
+            self.metadata_cache[key]
+        )
 
-    def parse_module(self, path, name):
-        """Parse a Python module."""
-        current_module = Module(name)
+    def parse_files(self, jobs):
+        """Parse `(path, name, strip_ext)` jobs, returning results in order.
 
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
+        Results are `(module, error)` pairs. Cached modules are reused when
+        a cache is configured, the remaining files are parsed by `run_jobs`.
+        """
+        if not self.cache:
+            return self.run_jobs(jobs)
 
-            if not os.path.isfile(item_path):
-                continue
+        results = [None] * len(jobs)
+        misses = []
 
-            if not item_path.endswith('.py'):
-                continue
+        for idx, job in enumerate(jobs):
+            module, entry = self.load_cached(job)
 
-            if item_path.endswith('__init__.py'):
-                continue
+            if module:
+                results[idx] = module, None
+            else:
+                misses.append(
+                    (idx, entry)
+                )
 
-            if item_path.endswith('__main__.py'):
-                continue
+        parsed = self.run_jobs(
+            [jobs[idx] for idx, entry in misses]
+        )
 
-            excluded = any(
-                fnmatch.fnmatchcase(item, pat=excl) for excl in self.exclude
-            )
+        for (idx, entry), result in zip(misses, parsed):
+            module, error = result
+            if not error:
+                key, fingerprint, digest = entry
+                self.cache.set(key, (fingerprint, digest, module))
 
-            if excluded:
-                continue
+            results[idx] = result
 
-            module = self.parse_file(item_path, item)
+        self.cache.close()
 
-            if item == '__init__.py':
-                current_module.merge(module)
-            elif not module.is_empty():
-                current_module.add_module(module)
+        return results
 
-        return current_module
+    def load_cached(self, job):
+        """Look a job up in the cache.
 
-    def parse_file(self, path, name, strip_ext=True):
-        """Parse a Python file."""
-        with open(path) as fh:
-            contents = fh.read()
+        Entries are validated against the file's size and modification time
+        first, then against its content hash so that files that were touched
+        but not modified are still hits. This returns a `(module, entry)`
+        pair where `entry` is what's needed to store a freshly parsed module.
+        """
+        path, name, strip_ext = job
+
+        key = self.cache.make_key(
+            'module', os.path.abspath(path), name, strip_ext,
+            self.source_signatures
+        )
+
+        fingerprint = file_fingerprint(path)
+        cached = self.cache.get(key)
+
+        if cached and cached[0] == fingerprint:
+            return cached[2], None
+
+        digest = file_digest(path)
+
+        if cached and cached[1] == digest:
+            self.cache.set(key, (fingerprint, digest, cached[2]))
+            return cached[2], None
 
-        if strip_ext:
-            name, ext = os.path.splitext(name)
+        return None, (key, fingerprint, digest)
 
-        root = ast.parse(contents)
+    def run_jobs(self, jobs):
+        """Parse jobs, spreading them over a process pool if allowed."""
+        parse = functools.partial(
+            parse_job, outline=self.outline,
+            source_signatures=self.source_signatures
+        )
+
+        if self.jobs < 2 or len(jobs) < 2:
+            return [parse(job) for job in jobs]
+
+        logger.debug(
+            'parsing {} files with {} jobs'.format(len(jobs), self.jobs)
+        )
+
+        from concurrent.futures import ProcessPoolExecutor
 
-        return Module.from_ast(root, name)
+        chunksize = max(1, len(jobs) // (self.jobs * 4))
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            return list(
+                executor.map(parse, jobs, chunksize=chunksize)
+            )
+
+    def parse_file(self, path, name, strip_ext=True):
+        """Parse a Python file."""
+        return parse_file(
+            path, name, strip_ext, outline=self.outline,
+            source_signatures=self.source_signatures
+        )
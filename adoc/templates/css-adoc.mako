@@ -28,6 +28,10 @@ body {
   padding: 30px;
   overflow: hidden;
 }
+  #sidebar .count {
+    color: #888;
+    font-size: 75%;
+  }
 #nav {
   font-size: 130%;
   margin: 0 0 15px 0;
@@ -2,22 +2,7 @@
 <head>
   <%namespace name="macros" file="macros.mako" />
 
-  <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1, minimum-scale=1" />
-
-  <title>${project.name} documentation</title>
-  <meta name="description" content="" />
-
-  <link href="https://fonts.googleapis.com/css?family=Source+Sans+Pro:400,300"
-    rel="stylesheet" type="text/css">
-
-  <style type="text/css">
-<%include file="css-pygments.mako" />
-<%include file="css-normalize.mako" />
-<%include file="css-adoc.mako" />
-<%include file="css-rst.mako" />
-<%include file="css-print.mako" />
-  </style>
+  ${macros.head('{} documentation'.format(project.name))}
 </head>
 <body>
   <div id="container">
@@ -110,6 +95,7 @@
         <li class="set">
           <h3 id="modules">
             <a href="#modules">Modules</a>
+            <span class="count">${len(project.symbols.modules)}</span>
           </h3>
 
           ${macros.list_modules(project)}
@@ -118,17 +104,19 @@
         <li class="set">
           <h3 id="functions">
             <a href="#functions">Functions</a>
+            <span class="count">${project.function_count}</span>
           </h3>
 
-          ${macros.list_functions(project)}
+          ${macros.list_functions(project.symbols.functions)}
         </li>
 
         <li class="set">
           <h3 id="classes">
             <a href="#classes">Classes</a>
+            <span class="count">${project.class_count}</span>
           </h3>
 
-          ${macros.list_classes(project)}
+          ${macros.list_classes(project.symbols.classes)}
         </li>
       </ul>
     </div>
@@ -151,21 +139,17 @@
           API Reference
         </h1>
 
-        ${macros.show_modules(project)}
+        % if modules:
+          ${macros.show_modules(modules)}
+        % else:
+          ${macros.list_modules(project)}
+        % endif
       </section>
     </article>
 
     <div class="clear"> </div>
 
-    <footer id="footer">
-      <p>
-        Generated by <a href="https://github.com/saalaa/adoc">adoc</a>
-      </p>
-
-      <p>
-        Designed by <a href="http://nadh.in">Kailash Nadh</a>
-      </p>
-    </footer>
+    ${macros.footer()}
   </div>
 
   <script>
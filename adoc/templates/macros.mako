@@ -3,7 +3,7 @@
 </%def>
 
 <%def name="link(atom, text=None)">
-    <a href="#${atom.fully_qualified_name}" title="${atom.fully_qualified_name}">
+    <a href="${url(atom)}" title="${atom.fully_qualified_name}">
         ${text or atom.name}
     </a>
 </%def>
@@ -21,8 +21,39 @@
   % endif
 </%def>
 
-<%def name="show_modules(project)">
-    % for module in project.iter_modules():
+<%def name="head(title)">
+  <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1, minimum-scale=1" />
+
+  <title>${title}</title>
+  <meta name="description" content="" />
+
+  <link href="https://fonts.googleapis.com/css?family=Source+Sans+Pro:400,300"
+    rel="stylesheet" type="text/css">
+
+  % if stylesheet:
+  <link href="${stylesheet}" rel="stylesheet" type="text/css">
+  % else:
+  <style type="text/css">
+<%include file="stylesheet.mako" />
+  </style>
+  % endif
+</%def>
+
+<%def name="footer()">
+    <footer id="footer">
+      <p>
+        Generated by <a href="https://github.com/saalaa/adoc">adoc</a>
+      </p>
+
+      <p>
+        Designed by <a href="http://nadh.in">Kailash Nadh</a>
+      </p>
+    </footer>
+</%def>
+
+<%def name="show_modules(modules)">
+    % for module in modules:
         <section class="section-items">
         <h2 class="section-title" ${anchor(module)}>
             Module <code>${module.fully_qualified_name}</code>
@@ -129,7 +160,7 @@
 
 <%def name="list_modules(root)">
     <ul>
-        % for module in root.iter_modules():
+        % for module in root.symbols.modules:
             <li class="mono searchable" data-fqn="${module.fully_qualified_name.lower()}">
                 ${link(module, module.fully_qualified_name)}
             </li>
@@ -137,9 +168,9 @@
     </ul>
 </%def>
 
-<%def name="list_functions(project)">
+<%def name="list_functions(functions)">
     <ul>
-        % for function in project.iter_functions():
+        % for function in functions:
             <li class="mono searchable" data-fqn="${function.fully_qualified_name.lower()}">
                 ${link(function)}
             </li>
@@ -147,9 +178,9 @@
     </ul>
 </%def>
 
-<%def name="list_classes(modules)">
+<%def name="list_classes(classes)">
     <ul>
-        % for klass in project.iter_classes():
+        % for klass in classes:
             <li class="mono searchable" data-fqn="${klass.fully_qualified_name.lower()}">
                 ${link(klass)}
             </li>
@@ -0,0 +1,62 @@
+<!doctype html>
+<head>
+  <%namespace name="macros" file="macros.mako" />
+
+  ${macros.head('{} - {} documentation'.format(module.fully_qualified_name, project.name))}
+</head>
+<body>
+  <div id="container">
+    <div id="sidebar">
+      <h2>
+        <a href="${index_url}"><strong>${project.name}</strong></a>
+
+        % if project.has_meta('version'):
+          (<small>${project.get_meta('version')}</small>)
+        % endif
+      </h2>
+
+      <h2>Module</h2>
+
+      <ul id="index">
+        <li class="set">
+          <h3>
+            <a href="${url(module)}">${module.fully_qualified_name}</a>
+          </h3>
+        </li>
+
+        % if module.functions:
+          <li class="set">
+            <h3>
+              Functions
+              <span class="count">${len(module.functions)}</span>
+            </h3>
+
+            ${macros.list_functions(module.functions)}
+          </li>
+        % endif
+
+        % if module.classes:
+          <li class="set">
+            <h3>
+              Classes
+              <span class="count">${len(module.classes)}</span>
+            </h3>
+
+            ${macros.list_classes(module.classes)}
+          </li>
+        % endif
+      </ul>
+    </div>
+
+    <article id="content">
+      <section>
+        ${macros.show_modules([module])}
+      </section>
+    </article>
+
+    <div class="clear"> </div>
+
+    ${macros.footer()}
+  </div>
+</body>
+</html>
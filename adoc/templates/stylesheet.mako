@@ -0,0 +1,5 @@
+<%include file="css-pygments.mako" />
+<%include file="css-normalize.mako" />
+<%include file="css-adoc.mako" />
+<%include file="css-rst.mako" />
+<%include file="css-print.mako" />
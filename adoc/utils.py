@@ -1,23 +1,99 @@
 import os
 
-from functools import wraps
+from html.parser import HTMLParser
 
 
-def memoized(f):
-    f._cache = {}
+class cached_property:
+    """Property computed once per instance and stored on that instance.
 
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        if args in f._cache:
-            return f._cache[args]
+    Cached values live and die with their instance; `invalidate` drops them so
+    that they are computed again on next access.
+    """
+    def __init__(self, f):
+        self.f = f
+        self.attr = '_' + f.__name__
+        self.__doc__ = f.__doc__
 
-        value = f(*args, **kwargs)
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
 
-        f._cache[args] = value
+        try:
+            return getattr(instance, self.attr)
+        except AttributeError:
+            pass
+
+        value = self.f(instance)
+
+        setattr(instance, self.attr, value)
 
         return value
 
-    return wrapper
+
+def invalidate(instance, *names):
+    """Drop `cached_property` values of an instance."""
+    for name in names:
+        try:
+            delattr(instance, '_' + name)
+        except AttributeError:
+            pass
+
+
+# Elements without end tags.
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+}
+
+
+class HeadingParser(HTMLParser):
+    """Incremental HTML parser collecting the text of the first heading."""
+    def __init__(self, tag):
+        super().__init__()
+
+        self.tag = tag
+        self.depth = 0
+        self.contents = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done or tag in VOID_ELEMENTS:
+            return
+
+        if self.depth:
+            self.depth += 1
+        elif tag == self.tag:
+            self.depth = 1
+
+    def handle_endtag(self, tag):
+        if not self.depth or tag in VOID_ELEMENTS:
+            return
+
+        self.depth -= 1
+
+        if not self.depth:
+            self.done = True
+
+    def handle_data(self, data):
+        if self.depth and not self.done:
+            self.contents.append(data)
+
+
+def find_heading(html, tag='h1', chunk_size=16384):
+    """Extract the text of the first `tag` element of an HTML document.
+
+    The document is fed to the parser in chunks, parsing stops as soon as the
+    heading is closed. This returns `None` if there's no such heading.
+    """
+    parser = HeadingParser(tag)
+
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+
+        if parser.done:
+            return ''.join(parser.contents)
+
+    return None
 
 
 def compose(*functions):
@@ -42,3 +118,71 @@ class WorkingDirectory:
 
     def __exit__(self, *args):
         os.chdir(self.initial_wd)
+
+
+def same_contents(path, other_path):
+    """Tell whether two files have the same contents."""
+    if os.path.getsize(path) != os.path.getsize(other_path):
+        return False
+
+    with open(path, 'rb') as fh, open(other_path, 'rb') as other_fh:
+        while True:
+            chunk = fh.read(65536)
+
+            if chunk != other_fh.read(65536):
+                return False
+
+            if not chunk:
+                return True
+
+
+def open_temp(path):
+    """Create a temporary file next to `path`, return its descriptor and path.
+
+    Unlike `tempfile.mkstemp`, which makes private files, the file gets the
+    permissions of any new file (0666 less the umask).
+    """
+    directory, name = os.path.split(path)
+
+    while True:
+        tmp_path = os.path.join(
+            directory, '.{}.{}.tmp'.format(name, os.urandom(4).hex())
+        )
+
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+
+        return fd, tmp_path
+
+
+def write_atomic(path, write_func, keep_unchanged=False, binary=False):
+    """Write a file through a temporary file, replacing it only once done.
+
+    With `keep_unchanged`, an existing file with the same contents is left
+    untouched. Text is written as UTF-8, unless `binary` is set. This returns
+    whether the file was replaced.
+    """
+    fd, tmp_path = open_temp(path)
+
+    try:
+        if binary:
+            fh = open(fd, 'wb')
+        else:
+            fh = open(fd, 'w', encoding='utf-8')
+
+        with fh:
+            write_func(fh)
+
+        if keep_unchanged and os.path.isfile(path) \
+                and same_contents(path, tmp_path):
+            os.remove(tmp_path)
+            return False
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    return True
@@ -0,0 +1,239 @@
+"""File-change detection.
+
+Watchers report which files changed under a project tree since they were last
+asked. On Linux, changes are collected through inotify (via `ctypes`, no extra
+dependency); elsewhere, or when inotify is not usable, the tree is polled and
+compared against a snapshot of file sizes and modification times.
+"""
+
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+from .discovery import is_pruned
+
+logger = logging.getLogger(__name__)
+
+
+def walk_files(root, is_root=True):
+    """Recursively yield files under `root`, skipping ignored directories."""
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if not is_pruned(entry.path, is_root):
+                yield from walk_files(entry.path, False)
+        elif entry.is_file():
+            yield entry
+
+
+class PollingWatcher:
+    """Detect changes by comparing snapshots of the watched files."""
+    def __init__(self, root, files=()):
+        self.root = os.path.realpath(root)
+        self.files = [os.path.realpath(file) for file in files]
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+
+        for entry in walk_files(self.root):
+            stat = entry.stat()
+            snapshot[entry.path] = (
+                stat.st_size, stat.st_mtime_ns
+            )
+
+        for file in self.files:
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+
+            snapshot[file] = stat.st_size, stat.st_mtime_ns
+
+        return snapshot
+
+    def changes(self):
+        """Return the set of paths created, modified or deleted."""
+        snapshot = self.take_snapshot()
+
+        changed = {
+            path for path, fingerprint in snapshot.items()
+            if self.snapshot.get(path) != fingerprint
+        }
+
+        changed.update(
+            set(self.snapshot) - set(snapshot)
+        )
+
+        self.snapshot = snapshot
+
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detect changes through Linux's inotify.
+
+    `changes` returns `None` when the kernel queue overflowed, in which case
+    changes are unknown and everything should be considered modified.
+    """
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM \
+        | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, root, files=()):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+
+        self.libc = ctypes.CDLL(
+            ctypes.util.find_library('c'), use_errno=True
+        )
+
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.root = os.path.realpath(root)
+        self.files = {os.path.realpath(file) for file in files}
+        self.watches = {}
+
+        try:
+            self.watch_tree(self.root)
+
+            for file in self.files:
+                self.watch(
+                    os.path.dirname(file)
+                )
+        except OSError:
+            self.close()
+            raise
+
+    def watch(self, path):
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(path), self.MASK
+        )
+
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+
+        self.watches[wd] = path
+
+    def watch_tree(self, root):
+        self.watch(root)
+
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) \
+                    and not is_pruned(entry.path, root == self.root):
+                self.watch_tree(entry.path)
+
+    def is_watched(self, path):
+        if path in self.files:
+            return True
+
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def read_events(self):
+        events = []
+
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self.EVENT.unpack_from(
+                    data, offset
+                )
+
+                offset += self.EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                events.append(
+                    (wd, mask, os.fsdecode(name))
+                )
+
+    def changes(self):
+        """Return the set of paths created, modified or deleted."""
+        changed = set()
+
+        for wd, mask, name in self.read_events():
+            if mask & self.IN_Q_OVERFLOW:
+                logger.debug('inotify queue overflow')
+                return None
+
+            if mask & self.IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+
+            path = os.path.join(directory, name) if name else directory
+
+            if name and mask & self.IN_ISDIR:
+                if is_pruned(path, directory == self.root):
+                    continue
+
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    try:
+                        self.watch_tree(path)
+                    except OSError:
+                        return None
+
+            if self.is_watched(path):
+                changed.add(path)
+
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def make_watcher(root, files=()):
+    """Build the best watcher available on this platform."""
+    try:
+        watcher = InotifyWatcher(root, files)
+    except (OSError, AttributeError) as err:
+        logger.debug(
+            'inotify unavailable ({}), polling for changes'.format(err)
+        )
+
+        return PollingWatcher(root, files)
+
+    logger.debug('watching for changes with inotify')
+
+    return watcher
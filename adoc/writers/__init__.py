@@ -1,17 +1,46 @@
+"""Output writers.
+
+Writers are imported on first use so that their dependencies (`mako`,
+`weasyprint`...) are only loaded when the corresponding output is requested.
+"""
+
 from ..errors import FatalError
 
-from .html import write_html
-from .md import write_md
-from .pdf import write_pdf
+
+def write_html(*args, **kwargs):
+    from .html import write_html
+
+    return write_html(*args, **kwargs)
+
+
+def write_html_dir(*args, **kwargs):
+    from .pages import write_html_dir
+
+    return write_html_dir(*args, **kwargs)
+
+
+def write_md(*args, **kwargs):
+    from .md import write_md
+
+    return write_md(*args, **kwargs)
+
+
+def write_pdf(*args, **kwargs):
+    from .pdf import write_pdf
+
+    return write_pdf(*args, **kwargs)
 
 
 def find_writer(args):
-    if not args.html and not args.md and not args.pdf:
+    if not args.html and not args.html_dir and not args.md and not args.pdf:
         raise FatalError(
-            'no output format specified, use `--html`, `--md` or `--pdf`'
+            'no output format specified, use `--html`, `--html-dir`, `--md` '
+            'or `--pdf`'
         )
     elif args.html:
         return write_html
+    elif args.html_dir:
+        return write_html_dir
     elif args.md:
         return write_md
     elif args.pdf:
@@ -1,15 +1,23 @@
 """HTML writer."""
 
 import os
+import gzip
 import logging
+import functools
+import io
+import hashlib
+import threading
 import mako.lookup
+import mako.runtime
 import mako.exceptions
 import traceback
 
 from ..errors import FatalError
-from ..utils import compose
+from ..utils import write_atomic
+from ..version import version
 from ..formats import (
-    stripper, format_md, format_rst
+    format_md, format_rst, formatter_config, get_formatter, format_docstring,
+    get_settings
 )
 
 logger = logging.getLogger(__name__)
@@ -19,40 +27,243 @@ TEMPLATE_PATH = os.path.join(
     os.path.dirname(__file__), '..', 'templates'
 )
 
+# Below this many docstrings, a process pool costs more than it saves.
+MIN_POOL_DOCSTRINGS = 32
+
+STYLESHEET_TEMPLATE = 'stylesheet.mako'
+
+lookups = {}
+lookups_lock = threading.Lock()
+
+
+def get_lookup(cache_directory=None):
+    """Get the long-lived template lookup for a cache directory.
+
+    Lookups keep compiled templates in memory and check template files for
+    modifications. With a `cache_directory`, compiled template modules are
+    also written there, so that templates are not compiled again by later
+    runs; they are kept apart by program version and template location.
+    """
+    module_directory = None
+
+    if cache_directory is not None:
+        key = '{}\0{}'.format(version, os.path.realpath(TEMPLATE_PATH))
+
+        module_directory = os.path.join(
+            cache_directory, 'templates',
+            hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        )
+
+    with lookups_lock:
+        lookup = lookups.get(module_directory)
+
+        if lookup is None:
+            lookup = lookups[module_directory] = mako.lookup.TemplateLookup(
+                directories=[TEMPLATE_PATH],
+                module_directory=module_directory,
+                filesystem_checks=True
+            )
+
+    return lookup
+
 
 def write_html(filename, project, docstrings_format='md',
-               strip_docstrings=False):
-    with open(filename, 'w') as fh:
-        fh.write(
-            make_html(project, docstrings_format, strip_docstrings)
+               strip_docstrings=False, render_cache=None, jobs=1,
+               external_css=False):
+    """Write a project to an HTML file.
+
+    With `external_css`, the stylesheet is written next to the file (see
+    `write_stylesheet`) rather than inlined.
+    """
+    stylesheet = None
+
+    if external_css:
+        stylesheet = write_stylesheet(
+            os.path.dirname(os.path.abspath(filename)),
+            get_cache_directory(render_cache)
+        )
+
+    with open(filename, 'w', encoding='utf-8') as fh:
+        render_html(
+            fh, project, docstrings_format, strip_docstrings, render_cache,
+            jobs, stylesheet
+        )
+
+
+def make_stylesheet(cache_directory=None):
+    """Render the stylesheet of pages, returning `(name, css)`.
+
+    The name holds a digest of the contents, so that the file can be cached
+    for good by browsers and proxies.
+    """
+    buffer = io.StringIO()
+
+    render_template(buffer, STYLESHEET_TEMPLATE, cache_directory)
+
+    css = buffer.getvalue()
+    digest = hashlib.sha256(css.encode('utf-8')).hexdigest()
+
+    return 'adoc.{}.css'.format(digest[:12]), css
+
+
+def write_stylesheet(directory, cache_directory=None):
+    """Write the stylesheet of pages into `directory`, returning its name.
+
+    A gzipped copy is written alongside, for servers serving precompressed
+    files. Existing files are left untouched, as they are named after their
+    contents.
+    """
+    name, css = make_stylesheet(cache_directory)
+    path = os.path.join(directory, name)
+
+    def write_gzip(fh):
+        # No timestamp, so that the output only depends on the contents.
+        with gzip.GzipFile('', 'wb', 9, fh, mtime=0) as gz:
+            gz.write(css.encode('utf-8'))
+
+    if not os.path.isfile(path):
+        write_atomic(path, lambda fh: fh.write(css))
+
+    if not os.path.isfile(path + '.gz'):
+        write_atomic(path + '.gz', write_gzip, binary=True)
+
+    return name
+
+
+def prerender(project, docstrings_format, strip_docstrings, render_cache,
+              jobs=1, atoms=None):
+    """Render docstrings of `atoms` (all of the project's by default) into
+    `render_cache`.
+
+    Docstrings that aren't cached yet are spread over `jobs` processes.
+    """
+    if atoms is None:
+        atoms = project.symbols.atoms.values()
+
+    texts = [atom.doc for atom in atoms if atom.doc]
+
+    def map_func(func, items):
+        if jobs < 2 or len(items) < MIN_POOL_DOCSTRINGS:
+            return list(map(func, items))
+
+        logger.debug(
+            'rendering {} docstrings with {} jobs'.format(len(items), jobs)
         )
 
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(items) // (jobs * 4))
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(
+                executor.map(func, items, chunksize=chunksize)
+            )
+
+    render_cache.prerender(
+        functools.partial(
+            format_docstring, docstrings_format, strip_docstrings,
+            settings=get_settings()
+        ),
+        texts,
+        formatter_config(docstrings_format), strip_docstrings,
+        map_func=map_func
+    )
+
+
+def make_html(project, docstrings_format, strip_docstrings,
+              render_cache=None, jobs=1):
+    """Render a project to HTML, as a string (see `render_html`)."""
+    buffer = io.StringIO()
+
+    render_html(
+        buffer, project, docstrings_format, strip_docstrings, render_cache,
+        jobs
+    )
+
+    return buffer.getvalue()
+
+
+def render_html(fh, project, docstrings_format, strip_docstrings,
+                render_cache=None, jobs=1, stylesheet=None):
+    """Render a project to HTML, streaming it into a text file handle.
+
+    The template writes its output piece by piece into `fh`, so that the
+    whole page is never held in memory (`fh` should be buffered). The page
+    links to `stylesheet` if given, the stylesheet is inlined otherwise.
+    """
+    format_doc = make_format_doc(
+        project, docstrings_format, strip_docstrings, render_cache, jobs
+    )
+
+    render_template(
+        fh, 'html.mako', get_cache_directory(render_cache), stylesheet,
+        project=project,
+        modules=project.symbols.modules,
+        format_doc=format_doc,
+        url=anchor_url
+    )
 
-def make_html(project, docstrings_format, strip_docstrings):
-    if docstrings_format == 'rst':
-        format_doc = format_rst
-    else:
-        format_doc = format_md
 
-    if strip_docstrings:
-        format_doc = compose(stripper, format_doc)
+def anchor_url(atom):
+    """Link to an atom, within a single page."""
+    return '#' + atom.fully_qualified_name
 
+
+def get_cache_directory(render_cache):
+    """Directory of the on-disk store of `render_cache`, if any."""
+    if render_cache is None or render_cache.store is None:
+        return None
+
+    return render_cache.store.directory
+
+
+def make_format_doc(project, docstrings_format, strip_docstrings,
+                    render_cache=None, jobs=1, atoms=None):
+    """Make the docstring formatter templates use.
+
+    Rendered docstrings are looked up in and added to `render_cache` (a
+    `cache.RenderCache`), if given. Those of `atoms` (all of the project's
+    by default) are then rendered upfront, in `jobs` processes, before
+    templates look them up.
+    """
+    format_doc = get_formatter(docstrings_format, strip_docstrings)
+
+    if render_cache is not None:
+        prerender(
+            project, docstrings_format, strip_docstrings, render_cache, jobs,
+            atoms
+        )
+
+        format_doc = render_cache.wrap(
+            format_doc, formatter_config(docstrings_format), strip_docstrings
+        )
+
+    return format_doc
+
+
+def render_template(fh, name, cache_directory=None, stylesheet=None,
+                    **data):
+    """Render a template into a text file handle.
+
+    Compiled templates are stored in `cache_directory`, if given (see
+    `get_lookup`). Pages link to `stylesheet`, if given, and inline it
+    otherwise.
+    """
     try:
-        lookup = mako.lookup.TemplateLookup(directories=[TEMPLATE_PATH])
-        template = lookup.get_template('html.mako')
-
-        return template.render(
-            project=project,
-            format_md=format_md,
-            format_rst=format_rst,
-            format_doc=format_doc
+        template = get_lookup(cache_directory).get_template(name)
+
+        context = mako.runtime.Context(
+            fh, format_md=format_md, format_rst=format_rst,
+            stylesheet=stylesheet, **data
         )
+
+        template.render_context(context)
     except mako.exceptions.MakoException:
         tb = mako.exceptions.text_error_template() \
             .render()
 
         raise FatalError(
-            'error loading `html.mako`', tb=tb
+            'error loading `{}`'.format(name), tb=tb
         )
     except Exception:
         tb = traceback.format_exc()
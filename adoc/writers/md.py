@@ -11,7 +11,10 @@ from ..formats import (
 logger = logging.getLogger(__name__)
 
 
-def write_md(filename, project, docstrings_format, strip_docstrings):
+def write_md(filename, project, docstrings_format, strip_docstrings,
+             render_cache=None, jobs=1, external_css=False):
+    # Docstrings are written as they are, `render_cache`, `jobs` and
+    # `external_css` are not needed.
     with open(filename, 'w') as fh:
         fh.write(
             make_md(project, docstrings_format, strip_docstrings)
@@ -51,7 +54,7 @@ def make_md(project, docstrings_format, strip_docstrings):
 
     h1('API Reference')
 
-    for m in project.iter_modules():
+    for m in project.symbols.modules:
         if not m.doc and not m.functions and not m.classes:
             continue
 
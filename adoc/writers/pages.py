@@ -0,0 +1,364 @@
+"""Multi-page HTML writer.
+
+Projects are written to a directory: `index.html` holds documents and the
+index of all symbols, and each module gets its own page in `modules/`.
+
+A manifest records a digest of what each page was rendered from (the module,
+formatting settings, templates and program version). Pages whose digest didn't
+change are neither rendered nor written again, pages of removed modules are
+deleted. The index page is rendered every time but only replaced when its
+contents changed. An external stylesheet, if requested, is tracked in the
+manifest as well, so that outdated ones are deleted.
+
+With several jobs, stale pages are rendered by a pool of worker processes,
+each holding a copy of the project, a warm template lookup and warm
+formatters. The largest pages are scheduled first so that no long page is
+left running alone at the end.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+
+from ..cache import Cache, RenderCache, file_digest
+from ..formats import configure, formatter_config, get_formatter, get_settings
+from ..models import Module
+from ..utils import write_atomic
+from ..version import version
+from .html import (
+    TEMPLATE_PATH, anchor_url, get_cache_directory, get_lookup,
+    make_format_doc, render_template, write_stylesheet
+)
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_NAME = '.adoc-manifest.json'
+
+INDEX_PAGE = 'index.html'
+
+MODULES_DIR = 'modules'
+
+# Attributes of atoms that module pages are rendered from.
+ATOM_STATE = ('name', 'doc', 'parameters', 'decorators', 'bases')
+
+# Below this many stale pages, a process pool costs more than it saves.
+MIN_POOL_PAGES = 4
+
+# Estimated rendering cost of an atom, in docstring characters.
+ATOM_COST = 200
+
+# State of page rendering worker processes, see `init_worker`.
+worker = {}
+
+
+def page_name(module):
+    """Name of a module's page, in `MODULES_DIR`."""
+    return '{}.html'.format(module.fully_qualified_name)
+
+
+def get_module(atom):
+    """Find the module an atom is documented in."""
+    while not isinstance(atom, Module):
+        atom = atom.parent
+
+    return atom
+
+
+def make_url(prefix):
+    """Make a function linking to atoms in module pages, from `prefix`."""
+    def url(atom):
+        return '{}{}{}'.format(
+            prefix, page_name(get_module(atom)), anchor_url(atom)
+        )
+
+    return url
+
+
+def iter_atoms(module):
+    """Yield the atoms documented on a module's page."""
+    yield module
+
+    for function in module.functions or []:
+        yield function
+
+    for klass in module.classes or []:
+        yield klass
+
+        for method in klass.functions or []:
+            yield method
+
+
+def page_cost(module):
+    """Estimate the rendering cost of a module's page."""
+    return sum(
+        ATOM_COST + len(atom.doc or '') for atom in iter_atoms(module)
+    )
+
+
+def templates_digest():
+    """Digest of all templates, as pages depend on them."""
+    digest = hashlib.sha256()
+
+    for name in sorted(os.listdir(TEMPLATE_PATH)):
+        digest.update(
+            '{}\0{}\0'.format(
+                name, file_digest(os.path.join(TEMPLATE_PATH, name))
+            ).encode('utf-8')
+        )
+
+    return digest.hexdigest()
+
+
+def module_digest(module, config):
+    """Digest of what a module's page is rendered from."""
+    state = [config]
+
+    for atom in iter_atoms(module):
+        state.append(
+            (atom.type, atom.fully_qualified_name) + tuple(
+                getattr(atom, attr, None) for attr in ATOM_STATE
+            )
+        )
+
+    return hashlib.sha256(
+        repr(state).encode('utf-8', 'surrogatepass')
+    ).hexdigest()
+
+
+def load_manifest(directory):
+    """Load the manifest of a directory, `{page: digest}`."""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as fh:
+            return json.load(fh)['pages']
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_manifest(directory, pages):
+    write_atomic(
+        os.path.join(directory, MANIFEST_NAME),
+        lambda fh: json.dump({'pages': pages}, fh, indent=2, sort_keys=True)
+    )
+
+
+def write_html_dir(directory, project, docstrings_format='md',
+                   strip_docstrings=False, render_cache=None, jobs=1,
+                   external_css=False):
+    """Write a project to a directory, one HTML page per module.
+
+    With `external_css`, pages link to a stylesheet written at the root of
+    the directory (see `html.write_stylesheet`) rather than inlining it.
+    """
+    os.makedirs(
+        os.path.join(directory, MODULES_DIR), exist_ok=True
+    )
+
+    cache_directory = get_cache_directory(render_cache)
+
+    manifest = load_manifest(directory)
+    assets = {}
+    stylesheet = None
+
+    if external_css:
+        stylesheet = write_stylesheet(directory, cache_directory)
+
+        # Names of stylesheets are their digests.
+        assets[stylesheet] = assets[stylesheet + '.gz'] = stylesheet
+
+    config = (
+        version, templates_digest(), formatter_config(docstrings_format),
+        strip_docstrings, project.name, project.get_meta('version'),
+        stylesheet
+    )
+
+    pages = {}
+    stale = []
+
+    for module in project.symbols.modules:
+        name = '/'.join([MODULES_DIR, page_name(module)])
+        digest = module_digest(module, config)
+
+        pages[name] = digest
+
+        exists = os.path.isfile(os.path.join(directory, name))
+        if not exists or manifest.get(name) != digest:
+            stale.append((name, module))
+
+    # Largest pages first, see `render_pages`.
+    stale.sort(
+        key=lambda page: page_cost(page[1]), reverse=True
+    )
+
+    if jobs < 2 or len(stale) < MIN_POOL_PAGES:
+        format_doc = make_format_doc(
+            project, docstrings_format, strip_docstrings, render_cache, jobs,
+            atoms=[
+                atom for name, module in stale for atom in iter_atoms(module)
+            ]
+        )
+
+        timings = [
+            render_page(
+                directory, name, project, module, format_doc, cache_directory,
+                stylesheet
+            )
+            for name, module in stale
+        ]
+    else:
+        timings = render_pages(
+            directory, project, stale, docstrings_format, strip_docstrings,
+            cache_directory, jobs, stylesheet
+        )
+
+    log_timings(timings)
+
+    write_index(directory, project, cache_directory, stylesheet)
+
+    for name in set(manifest) - set(pages) - set(assets):
+        logger.debug(
+            'removing {}'.format(name)
+        )
+
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+    save_manifest(directory, dict(pages, **assets))
+
+    logger.info(
+        '{} pages written, {} unchanged'.format(
+            len(stale), len(pages) - len(stale)
+        )
+    )
+
+
+def write_index(directory, project, cache_directory=None, stylesheet=None):
+    """Write the index page, unless its contents didn't change."""
+    return write_atomic(
+        os.path.join(directory, INDEX_PAGE),
+        lambda fh: render_template(
+            fh, 'html.mako', cache_directory, stylesheet,
+            project=project,
+            modules=[],
+            format_doc=None,
+            url=make_url(MODULES_DIR + '/')
+        ),
+        keep_unchanged=True
+    )
+
+
+def render_page(directory, name, project, module, format_doc,
+                cache_directory=None, stylesheet=None):
+    """Write a module's page, returning `(name, seconds)`."""
+    started = time.perf_counter()
+
+    if stylesheet is not None:
+        stylesheet = '../' + stylesheet
+
+    write_atomic(
+        os.path.join(directory, name),
+        lambda fh: render_template(
+            fh, 'page.mako', cache_directory, stylesheet,
+            project=project,
+            module=module,
+            format_doc=format_doc,
+            url=make_url(''),
+            index_url='../' + INDEX_PAGE
+        )
+    )
+
+    return name, time.perf_counter() - started
+
+
+def render_pages(directory, project, pages, docstrings_format,
+                 strip_docstrings, cache_directory, jobs, stylesheet=None):
+    """Write `(name, module)` pages with a pool of `jobs` processes.
+
+    Pages are handed out one at a time, in order, so pages should come
+    largest first. Workers render docstrings themselves, sharing the on-disk
+    cache (if any) rather than the parent's in-memory one.
+    """
+    import multiprocessing
+
+    logger.debug(
+        'rendering {} pages with {} jobs'.format(len(pages), jobs)
+    )
+
+    initargs = (
+        directory, project, docstrings_format, strip_docstrings,
+        get_settings(), cache_directory, stylesheet
+    )
+
+    with multiprocessing.Pool(jobs, init_worker, initargs) as pool:
+        return list(
+            pool.imap_unordered(
+                render_worker_page, [name for name, module in pages]
+            )
+        )
+
+
+def init_worker(directory, project, docstrings_format, strip_docstrings,
+                settings, cache_directory, stylesheet):
+    """Set a worker process up, warming templates and formatters.
+
+    Errors are kept for `render_worker_page` to raise: the pool would respawn
+    workers failing here forever.
+    """
+    try:
+        configure(**settings)
+
+        format_doc = get_formatter(docstrings_format, strip_docstrings)
+        format_doc('')
+
+        if cache_directory is not None:
+            format_doc = RenderCache(Cache(cache_directory)).wrap(
+                format_doc, formatter_config(docstrings_format),
+                strip_docstrings
+            )
+
+        get_lookup(cache_directory).get_template('page.mako')
+
+        worker.update(
+            directory=directory,
+            project=project,
+            format_doc=format_doc,
+            cache_directory=cache_directory,
+            stylesheet=stylesheet,
+            modules={
+                '/'.join([MODULES_DIR, page_name(module)]): module
+                for module in project.symbols.modules
+            }
+        )
+    except Exception as error:
+        worker['error'] = error
+
+
+def render_worker_page(name):
+    if 'error' in worker:
+        raise worker['error']
+
+    return render_page(
+        worker['directory'], name, worker['project'], worker['modules'][name],
+        worker['format_doc'], worker['cache_directory'], worker['stylesheet']
+    )
+
+
+def log_timings(timings):
+    """Log how long each page took to render, slowest first."""
+    for name, seconds in sorted(timings, key=lambda item: -item[1]):
+        logger.debug(
+            'rendered {} in {:.1f}ms'.format(name, seconds * 1000)
+        )
+
+    if timings:
+        logger.debug(
+            'rendered {} pages in {:.1f}ms (slowest {:.1f}ms)'.format(
+                len(timings),
+                sum(seconds for name, seconds in timings) * 1000,
+                max(seconds for name, seconds in timings) * 1000
+            )
+        )
@@ -19,14 +19,20 @@ logging.getLogger('weasyprint') \
     )
 
 
-def write_pdf(filename, project, docstrings_format, strip_docstring):
+def write_pdf(filename, project, docstrings_format, strip_docstring,
+              render_cache=None, jobs=1, external_css=False):
+    # The stylesheet is always inlined, `external_css` is not needed.
     with open(filename, 'wb') as fh:
         fh.write(
-            make_pdf(project, docstrings_format, strip_docstring)
+            make_pdf(
+                project, docstrings_format, strip_docstring, render_cache,
+                jobs
+            )
         )
 
 
-def make_pdf(project, docstrings_format, strip_docstring):
+def make_pdf(project, docstrings_format, strip_docstring, render_cache=None,
+             jobs=1):
     try:
         from weasyprint import HTML
     except ImportError:
@@ -35,7 +41,7 @@ def make_pdf(project, docstrings_format, strip_docstring):
         )
 
     html = make_html(
-        project, docstrings_format, strip_docstring
+        project, docstrings_format, strip_docstring, render_cache, jobs
     )
 
     html = HTML(string=html)
@@ -0,0 +1,229 @@
+"""Code generation benchmark.
+
+Run with `python -m benchmarks.codegen` from the repository root. It compares
+`adoc.codegen.make_python` with the recursive implementation it replaced, on
+typical decorators and default values (which take `codegen.make_simple`), on
+larger expressions, and on a deeply chained call (expanded from an explicit
+stack past `codegen.MAX_DEPTH`).
+"""
+
+import ast
+import sys
+import timeit
+
+from adoc.codegen import (
+    BINARY_OP_MAPPING, UNARY_OP_MAPPING, COMPARE_OP_MAPPING, BOOL_OP_MAPPING,
+    lookup, make_python
+)
+
+NUMBER = 2000
+
+SOURCES = {
+    'decorator': "@app.route('/users/<id>', methods=['GET', 'POST'])",
+    'default': "x=os.environ.get('HOME', '~')",
+    'expression': "x=lambda a, b=2: a * b + (c if d else e)",
+    'dict': 'x={}'.format({'key_{}'.format(idx): idx for idx in range(50)}),
+}
+
+DEPTH = sys.getrecursionlimit()
+
+
+def legacy_make_signature(node):
+    items = []
+
+    padding = [None] * (len(node.args) - len(node.defaults))
+
+    for arg, default in zip(node.args, padding + node.defaults):
+        if not default:
+            items.append(arg.arg)
+        else:
+            items.append(
+                '{}={}'.format(arg.arg, legacy_make_python(default))
+            )
+
+    if node.vararg:
+        items.append(
+            '*{}'.format(node.vararg.arg)
+        )
+
+    if node.kwarg:
+        items.append(
+            '**{}'.format(node.kwarg.arg)
+        )
+
+    return items
+
+
+def legacy_make_python(node):
+    """`make_python` as it was before it became table-driven."""
+    if node is None:
+        return '!!!'
+    elif isinstance(node, ast.Constant):  # Num, Str, Bytes, NameConstant
+        if isinstance(node.value, bytes):
+            return "b'...'"
+        elif isinstance(node.value, str) or node.value in (None, True, False):
+            return repr(node.value)
+
+        return '{}'.format(node.value)
+    elif isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return '{}.{}'.format(
+            legacy_make_python(node.value), node.attr
+        )
+    elif isinstance(node, ast.Tuple):
+        items = [
+            legacy_make_python(element) for element in node.elts
+        ]
+
+        if len(items) == 1:
+            items.append('')
+
+        return '({})'.format(
+            ', '.join(items)
+        )
+    elif isinstance(node, ast.List):
+        items = [
+            legacy_make_python(element) for element in node.elts
+        ]
+
+        return '[{}]'.format(
+            ', '.join(items)
+        )
+    elif isinstance(node, ast.Set):
+        items = [
+            legacy_make_python(element) for element in node.elts
+        ]
+
+        return '{{{}}}'.format(
+            ', '.join(items)
+        )
+    elif isinstance(node, ast.Dict):
+        items = [
+            '{}: {}'.format(legacy_make_python(key), legacy_make_python(value))
+            for key, value in zip(node.keys, node.values)
+        ]
+
+        return '{{{}}}'.format(
+            ', '.join(items)
+        )
+    elif isinstance(node, ast.Call):
+        items = []
+
+        for arg in node.args:
+            items.append(
+                legacy_make_python(arg)
+            )
+
+        for keyword in node.keywords:
+            items.append(
+                '{}={}'.format(
+                    keyword.arg, legacy_make_python(keyword.value)
+                )
+            )
+
+        return '{}({})'.format(
+            legacy_make_python(node.func), ', '.join(items)
+        )
+    elif isinstance(node, ast.Lambda):
+        return 'lambda {}: {}'.format(
+            legacy_make_python(node.args), legacy_make_python(node.body)
+        )
+    elif isinstance(node, ast.UnaryOp):
+        return '{}{}'.format(
+            lookup(UNARY_OP_MAPPING, node.op),
+            legacy_make_python(node.operand)
+        )
+    elif isinstance(node, ast.BinOp):
+        return '{} {} {}'.format(
+            legacy_make_python(node.left),
+            lookup(BINARY_OP_MAPPING, node.op),
+            legacy_make_python(node.right)
+        )
+    elif isinstance(node, ast.Compare):
+        items = [
+            legacy_make_python(node.left)
+        ]
+
+        for op, right in zip(node.ops, node.comparators):
+            items.append(
+                lookup(COMPARE_OP_MAPPING, op)
+            )
+            items.append(
+                legacy_make_python(right)
+            )
+
+        return ' '.join(items)
+    elif isinstance(node, ast.BoolOp):
+        items = []
+        for idx, value in enumerate(node.values):
+            if idx:
+                items.append(
+                    lookup(BOOL_OP_MAPPING, node.op)
+                )
+
+            items.append(
+                legacy_make_python(value)
+            )
+
+        return '({})'.format(
+            ' '.join(items)
+        )
+    elif isinstance(node, ast.arguments):
+        return ', '.join(
+            legacy_make_signature(node)
+        )
+
+    return '???'
+
+
+def make_nodes():
+    nodes = {}
+
+    for name, source in sorted(SOURCES.items()):
+        if source.startswith('@'):
+            root = ast.parse(source + '\ndef f():\n    pass\n')
+            nodes[name] = root.body[0].decorator_list[0]
+        else:
+            root = ast.parse('def f({}):\n    pass\n'.format(source))
+            nodes[name] = root.body[0].args.defaults[0]
+
+    node = ast.Name(id='a', ctx=ast.Load())
+
+    for idx in range(DEPTH):
+        node = ast.Call(
+            func=ast.Attribute(value=node, attr='b', ctx=ast.Load()),
+            args=[ast.Constant(value=idx)],
+            keywords=[]
+        )
+
+    nodes['chain'] = node
+
+    return nodes
+
+
+def main():
+    for name, node in make_nodes().items():
+        number = 10 if name == 'chain' else NUMBER
+        timings = []
+
+        for function in (legacy_make_python, make_python):
+            try:
+                elapsed = min(timeit.repeat(
+                    lambda: function(node), number=number, repeat=20
+                ))
+            except RecursionError:
+                timings.append('RecursionError')
+                continue
+
+            timings.append(
+                '{:.1f}us'.format(elapsed / number * 1000000)
+            )
+
+        print('{:>10}: legacy {:>14}, table-driven {:>14}'.format(
+            name, *timings
+        ))
+
+
+if __name__ == '__main__':
+    main()
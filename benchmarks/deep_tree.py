@@ -0,0 +1,63 @@
+"""Module tree aggregates benchmark.
+
+Run with `python -m benchmarks.deep_tree` from the repository root. It builds a
+deep synthetic package hierarchy, mostly made of docstring-only modules, and
+checks whether the project is empty after each module is added, through
+maintained counts and through a recursive walk of the tree.
+"""
+
+import time
+
+from adoc.models import Project, Module, Function
+
+DEPTH = 100
+MODULES = 20  # Leaf modules per package
+
+
+def recursive_is_empty(module):
+    if getattr(module, 'functions', None) or getattr(module, 'classes', None):
+        return False
+
+    return all(recursive_is_empty(child) for child in module.modules or [])
+
+
+def build(is_empty):
+    project = Project('synthetic', None)
+    parent = project
+
+    for depth in range(DEPTH):
+        package = Module('package_{}'.format(depth))
+        parent.add_module(package)
+
+        for idx in range(MODULES):
+            module = Module('module_{}'.format(idx), 'Docstring only.')
+            package.add_module(module)
+
+            is_empty(project)
+
+        parent = package
+
+    for idx in range(MODULES):
+        module = Module('leaf_{}'.format(idx))
+        module.add_function(Function('function'))
+        parent.add_module(module)
+
+        is_empty(project)
+
+    return project
+
+
+def main():
+    for name, is_empty in (('recursive', recursive_is_empty),
+                           ('aggregates', Project.is_empty)):
+        start = time.perf_counter()
+        project = build(is_empty)
+        elapsed = time.perf_counter() - start
+
+        print('{:>10}: {:.3f}s ({} functions, depth {})'.format(
+            name, elapsed, project.function_count, DEPTH
+        ))
+
+
+if __name__ == '__main__':
+    main()
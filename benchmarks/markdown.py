@@ -0,0 +1,76 @@
+"""Markdown engines benchmark.
+
+Run with `python -m benchmarks.markdown` from the repository root. It renders
+the docstrings of the example projects (and of adoc itself), then a synthetic
+corpus of typical docstrings, with each available Markdown engine. Code
+highlighting, which is shared by all engines, is turned off.
+"""
+
+import glob
+import timeit
+import logging
+import importlib.util
+
+from adoc.formats import MD_ENGINES, configure, format_md
+from adoc.parser import ProjectParser
+
+REPEAT = 5
+
+DOCSTRINGS = 1000
+
+DOCSTRING = '''Summary of function {0}.
+
+A longer description, with *emphasis*, `code` and a [link](http://x.org/{0}).
+
+Arguments:
+
+- `value`: the value to process
+- `strict`: whether to fail on **errors**
+
+Example:
+
+```python
+result = function_{0}(value, strict=True)
+```
+'''
+
+
+def main():
+    logging.disable(logging.WARNING)
+
+    examples = []
+
+    for path in ['.'] + sorted(glob.glob('examples/*/')):
+        project = ProjectParser(path, {}).parse()
+
+        examples += [
+            atom.doc for atom in project.symbols.atoms.values() if atom.doc
+        ]
+
+    corpora = {
+        'examples': examples,
+        'synthetic': [DOCSTRING.format(idx) for idx in range(DOCSTRINGS)],
+    }
+
+    for engine, (module, requirement) in sorted(MD_ENGINES.items()):
+        if importlib.util.find_spec(requirement) is None:
+            print('{:>12}: not installed'.format(engine))
+            continue
+
+        configure(engine, highlight_code=False)
+
+        for name, texts in sorted(corpora.items()):
+            elapsed = min(timeit.repeat(
+                lambda: [format_md(text) for text in texts], number=1,
+                repeat=REPEAT
+            ))
+
+            print('{:>12}: {:.0f} {} docstrings per second'.format(
+                engine, len(texts) / elapsed, name
+            ))
+
+    configure()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Model memory benchmark.
+
+Run with `python -m benchmarks.memory` from the repository root. It builds a
+synthetic project (many modules holding decorated functions and classes with
+methods) and reports the memory held by the resulting models, ASTs excluded.
+"""
+
+import ast
+import tracemalloc
+
+from adoc.models import Project, Module
+
+MODULES = 200
+FUNCTIONS = 200  # Per module, half of which are methods
+
+
+def make_source(idx):
+    lines = ['"""Module {}."""'.format(idx)]
+
+    for func in range(FUNCTIONS // 2):
+        lines += [
+            '@decorator(option=True)',
+            'def function_{}(self, value, *args, key=None, **kwargs):'.format(
+                func
+            ),
+            '    """Function {}."""'.format(func),
+        ]
+
+    for klass in range(FUNCTIONS // 20):
+        lines.append('class Class{}(Base):'.format(klass))
+
+        for method in range(10):
+            lines += [
+                '    @property',
+                '    def method_{}(self, value=None):'.format(method),
+                '        pass',
+            ]
+
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    sources = [make_source(idx) for idx in range(MODULES)]
+
+    tracemalloc.start()
+
+    project = Project('synthetic', None)
+
+    for idx, source in enumerate(sources):
+        project.add_module(
+            Module.from_ast(ast.parse(source), 'module_{}'.format(idx))
+        )
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    atoms = MODULES * (FUNCTIONS + FUNCTIONS // 20 + 1)
+
+    print('{} atoms: {:.1f}MB, {:.0f} bytes per atom (peak {:.1f}MB)'.format(
+        atoms, current / 2 ** 20, current / atoms, peak / 2 ** 20
+    ))
+
+
+if __name__ == '__main__':
+    main()
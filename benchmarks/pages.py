@@ -0,0 +1,67 @@
+"""Multi-page rendering benchmark.
+
+Run with `python -m benchmarks.pages` from the repository root. It writes a
+synthetic project, whose module sizes are skewed like real ones (a few large
+modules, many small ones), to a fresh directory with one job and with a pool
+of one job per CPU. Docstrings are rendered without any cache.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+from adoc.models import Project, Module, Function, Class
+from adoc.writers.pages import write_html_dir
+
+MODULES = 64
+
+DOC = '''Do something with `{}`.
+
+Some **Markdown**, with a list:
+
+- one
+- two
+
+    def example():
+        return {!r}
+'''
+
+
+def build():
+    project = Project('synthetic', None)
+
+    for idx in range(MODULES):
+        module = Module('module_{}'.format(idx), DOC.format(idx, idx))
+        project.add_module(module)
+
+        # Module sizes fall off quickly, as in real projects.
+        for jdx in range(200 // (idx + 1)):
+            name = 'function_{}'.format(jdx)
+            module.add_function(Function(name, DOC.format(name, jdx)))
+
+        klass = Class('Class', DOC.format('Class', idx))
+        klass.add_function(Function('method', DOC.format('method', idx)))
+        module.add_class(klass)
+
+    return project
+
+
+def main():
+    project = build()
+
+    for jobs in sorted({1, os.cpu_count() or 1}):
+        directory = tempfile.mkdtemp()
+
+        try:
+            start = time.perf_counter()
+            write_html_dir(directory, project, 'md', False, jobs=jobs)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(directory)
+
+        print('{:>3} jobs: {:.3f}s ({} pages)'.format(jobs, elapsed, MODULES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""reStructuredText rendering benchmark.
+
+Run with `python -m benchmarks.rst` from the repository root. It renders the
+docstrings of the example projects (and of adoc itself) with a fresh
+`docutils.core.publish_parts` call each, as adoc used to, and with a
+long-lived `RstEngine`.
+"""
+
+import glob
+import timeit
+import logging
+
+from docutils import core
+from docutils.writers.html4css1 import Writer
+
+from adoc.parser import ProjectParser
+from adoc.formats.rst import RstEngine
+
+REPEAT = 5
+
+
+def publish_parts(text):
+    return core.publish_parts(text, writer=Writer())['fragment']
+
+
+def main():
+    logging.disable(logging.WARNING)
+
+    texts = []
+
+    for path in ['.'] + sorted(glob.glob('examples/*/')):
+        project = ProjectParser(path, {}).parse()
+
+        texts += [
+            atom.doc for atom in project.symbols.atoms.values() if atom.doc
+        ]
+
+    engine = RstEngine()
+
+    for name, function in (('publish_parts', publish_parts),
+                           ('engine', engine.render)):
+        elapsed = min(timeit.repeat(
+            lambda: [function(text) for text in texts], number=1,
+            repeat=REPEAT
+        ))
+
+        print('{:>14}: {:.2f}ms per docstring ({} docstrings)'.format(
+            name, elapsed / len(texts) * 1000, len(texts)
+        ))
+
+
+if __name__ == '__main__':
+    main()
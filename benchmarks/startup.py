@@ -0,0 +1,55 @@
+"""CLI startup benchmark.
+
+Run with `python -m benchmarks.startup` from the repository root. It reports
+the cumulative import time of `adoc.cli` (median over several runs) and the
+slowest imports of the last run.
+"""
+
+import sys
+import statistics
+import subprocess
+
+RUNS = 10
+
+
+def import_times():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import adoc.cli'],
+        stderr=subprocess.PIPE,
+        check=True
+    )
+
+    times = []
+
+    for line in result.stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        self_time, cumulative, name = line[12:].split('|')
+        times.append(
+            (int(cumulative), name.rstrip())
+        )
+
+    return times
+
+
+def main():
+    totals = []
+
+    for run in range(RUNS):
+        times = import_times()
+        totals.append(
+            dict((name.strip(), us) for us, name in times)['adoc.cli']
+        )
+
+    print('adoc.cli import: {:.1f}ms (median of {} runs)'.format(
+        statistics.median(totals) / 1000, RUNS
+    ))
+
+    print('slowest imports:')
+    for us, name in sorted(times, reverse=True)[:15]:
+        print('{:>10.1f}ms  {}'.format(us / 1000, name))
+
+
+if __name__ == '__main__':
+    main()
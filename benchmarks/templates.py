@@ -0,0 +1,70 @@
+"""Template compilation benchmark.
+
+Run with `python -m benchmarks.templates` from the repository root. It renders
+the documentation of the Flask example project with a fresh template lookup
+(templates compiled from source, as every build used to), a fresh lookup
+reading compiled template modules from disk (a new run), and a long-lived
+lookup (another build of the same run). Docstrings are rendered beforehand.
+"""
+
+import io
+import shutil
+import timeit
+import tempfile
+
+import mako.lookup
+import mako.runtime
+
+from adoc.cache import RenderCache
+from adoc.formats import format_md, format_rst, formatter_config, get_formatter
+from adoc.parser import ProjectParser
+from adoc.writers.html import TEMPLATE_PATH
+
+REPEAT = 10
+
+
+def main():
+    project = ProjectParser('examples/flask-project', {}).parse()
+
+    format_doc = RenderCache().wrap(
+        get_formatter('md'), formatter_config('md'), False
+    )
+
+    def render(lookup):
+        context = mako.runtime.Context(
+            io.StringIO(),
+            project=project,
+            format_md=format_md,
+            format_rst=format_rst,
+            format_doc=format_doc
+        )
+
+        lookup.get_template('html.mako').render_context(context)
+
+    def make_lookup(module_directory=None):
+        return mako.lookup.TemplateLookup(
+            directories=[TEMPLATE_PATH], module_directory=module_directory
+        )
+
+    module_directory = tempfile.mkdtemp()
+    lookup = make_lookup(module_directory)
+
+    render(lookup)
+
+    cases = [
+        ('cold', lambda: render(make_lookup())),
+        ('warm (disk)', lambda: render(make_lookup(module_directory))),
+        ('warm (memory)', lambda: render(lookup)),
+    ]
+
+    try:
+        for name, function in cases:
+            elapsed = min(timeit.repeat(function, number=1, repeat=REPEAT))
+
+            print('{:>14}: {:.1f}ms'.format(name, elapsed * 1000))
+    finally:
+        shutil.rmtree(module_directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,10 @@ with open('requirements-pdf.txt') as fh:
     requirements_pdf = fh.read() \
             .split()
 
+with open('requirements-commonmark.txt') as fh:
+    requirements_commonmark = fh.read() \
+            .split()
+
 setup(
     name='adoc',
     version=version,
@@ -30,7 +34,8 @@ setup(
     python_requires='~=3.5',
     install_requires=requirements,
     extras_require={
-        'pdf': requirements_pdf
+        'pdf': requirements_pdf,
+        'commonmark': requirements_commonmark
     },
     packages=find_packages(),
     include_package_data=True,
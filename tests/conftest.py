@@ -0,0 +1,25 @@
+import os
+import pytest
+
+
+def write(path, text=''):
+    """Write a file, creating its directory if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'w') as fh:
+        fh.write(text)
+
+
+def touch(root, *paths):
+    """Create empty files, given as paths relative to `root`."""
+    for path in paths:
+        write(os.path.join(root, path))
+
+
+@pytest.fixture
+def project_dir(tmpdir):
+    """Project directory with an empty `pkg` package."""
+    root = tmpdir.mkdir('project')
+    write(str(root.join('pkg', '__init__.py')))
+
+    return root
@@ -0,0 +1,144 @@
+import os
+import time
+
+import adoc.parser
+import adoc.writers.html
+
+from adoc.cache import Cache, RenderCache
+from adoc.parser import ProjectParser
+from adoc.writers.html import make_html
+
+
+def test_get_set(tmpdir):
+    cache = Cache(str(tmpdir))
+    key = cache.make_key('foo', 1)
+
+    assert cache.get(key) is None
+    assert cache.misses == 1
+
+    cache.set(key, {'bar': [1, 2]})
+
+    assert cache.get(key) == {'bar': [1, 2]}
+    assert cache.hits == 1
+
+    assert key != cache.make_key('foo', 2)
+
+
+def test_unreadable(tmpdir):
+    cache = Cache(str(tmpdir))
+    key = cache.make_key('foo')
+
+    cache.set(key, 'bar')
+
+    with open(cache.entry_path(key), 'wb') as fh:
+        fh.write(b'garbage')
+
+    assert cache.get(key, 'default') == 'default'
+    assert not os.path.exists(cache.entry_path(key))
+
+
+def test_prune(tmpdir):
+    cache = Cache(str(tmpdir), max_size=0)
+    keys = [cache.make_key(idx) for idx in range(3)]
+
+    for idx, key in enumerate(keys):
+        cache.set(key, 'x' * 100)
+
+        past = time.time() - 100 + idx
+        os.utime(cache.entry_path(key), (past, past))
+
+    size = os.path.getsize(cache.entry_path(keys[0]))
+    cache.max_size = size * 2
+
+    cache.get(keys[0])  # Most recently used now
+    cache.close()
+
+    assert os.path.exists(cache.entry_path(keys[0]))
+    assert not os.path.exists(cache.entry_path(keys[1]))
+    assert os.path.exists(cache.entry_path(keys[2]))
+
+
+def test_parse_cached(tmpdir, monkeypatch):
+    cache = Cache(str(tmpdir))
+
+    project = ProjectParser('.', {}, cache=cache).parse()
+
+    assert cache.misses
+    assert not cache.hits
+
+    def parse_file(*args, **kwargs):
+        raise AssertionError('parse_file called')
+
+    monkeypatch.setattr(adoc.parser, 'parse_file', parse_file)
+
+    cache = Cache(str(tmpdir))
+    cached = ProjectParser('.', {}, cache=cache).parse()
+
+    assert cache.hits
+    assert not cache.misses
+
+    assert [f.fully_qualified_name for f in project.iter_functions()] == [
+        f.fully_qualified_name for f in cached.iter_functions()
+    ]
+
+
+def test_render_cache(tmpdir):
+    calls = []
+
+    def render(text):
+        calls.append(text)
+        return '<p>{}</p>'.format(text)
+
+    cache = RenderCache(Cache(str(tmpdir)), max_entries=2)
+    format_doc = cache.wrap(render, 'md')
+
+    assert format_doc('foo') == '<p>foo</p>'
+    assert format_doc('foo') == '<p>foo</p>'
+    assert calls == ['foo']
+    assert cache.hits == 1
+
+    cache.wrap(render, 'rst')('foo')
+    format_doc('bar')
+
+    assert calls == ['foo', 'foo', 'bar']
+    assert len(cache.entries) == 2
+
+    cache.close()
+
+    cache = RenderCache(Cache(str(tmpdir)))
+    format_doc = cache.wrap(render, 'md')
+
+    assert format_doc('foo') == '<p>foo</p>'
+    assert format_doc('bar') == '<p>bar</p>'
+    assert calls == ['foo', 'foo', 'bar']
+    assert cache.store_hits == 2
+
+
+def test_prerender(monkeypatch):
+    monkeypatch.setattr(adoc.writers.html, 'MIN_POOL_DOCSTRINGS', 1)
+
+    project = ProjectParser('.', {}).parse()
+
+    serial = RenderCache()
+    parallel = RenderCache()
+
+    contents = make_html(project, 'rst', False, serial)
+    assert make_html(project, 'rst', False, parallel, jobs=2) == contents
+
+    assert parallel.misses == len(parallel.entries)
+    assert parallel.hits > 0
+
+
+def test_prerender_capacity():
+    cache = RenderCache(max_entries=2)
+
+    cache.prerender(str.upper, ['a', 'b', 'c', 'd'], 'md')
+
+    assert len(cache.entries) == 4
+    assert cache.wrap(str.upper, 'md')('a') == 'A'
+    assert cache.hits == 1
+
+    cache.close()
+
+    assert cache.max_entries == 2
+    assert len(cache.entries) == 2
@@ -1,7 +1,8 @@
 import ast
+import sys
 import textwrap
 
-from adoc.codegen import make_python
+from adoc.codegen import Source, make_python, make_signature, make_simple
 
 
 def test_unsupported(capsys):
@@ -172,3 +173,89 @@ def test_function_decorators():
     assert make_python(node.decorator_list[2]) == (
             "bar(-1, 2.3, nope={True: None})"
     )
+
+
+def test_expressions():
+    sources = [
+        "(a + b) * c",
+        "a - (b - c)",
+        "a ** b ** c",
+        "(-x) ** 2",
+        "not a == b",
+        "(a if b else c) if d else e",
+        "lambda x, *y: x @ y",
+        "x[1:2, ::3]",
+        "f(*args, key=value, **kwargs)",
+        "{**a, 'b': ...}",
+        "(a + b).c",
+        "(1).real",
+        "x[1,]",
+        "x[1:2,]",
+    ]
+
+    for source in sources:
+        node = ast.parse(source, mode='eval').body
+
+        assert make_python(node) == source
+
+
+def test_simple():
+    def parse(source):
+        return ast.parse(source, mode='eval').body
+
+    source = "app.route('/', methods=['GET'], **{'a': (b, ), **c})"
+
+    assert make_simple(parse(source)) == source
+    assert make_simple(parse("f(a + b)")) is None
+    assert make_simple(parse("(1).real")) is None
+
+
+def test_deep_nesting():
+    node = ast.Name(id='a', ctx=ast.Load())
+
+    for idx in range(sys.getrecursionlimit() * 2):
+        node = ast.Call(
+            func=ast.Attribute(value=node, attr='b', ctx=ast.Load()),
+            args=[ast.Constant(value=idx)],
+            keywords=[]
+        )
+
+    code = make_python(node)
+
+    assert code.startswith('a.b(0).b(1).b(2)')
+
+
+def test_function_kwonly():
+    source = '''
+    def foo(a, /, b=1, *, c, d={}, **e):
+        pass
+    '''
+
+    root = ast.parse(
+        textwrap.dedent(source)
+    )
+
+    node = root.body[0]
+
+    assert make_python(node.args) == "a, /, b=1, *, c, d={}, **e"
+
+
+def test_source_signature():
+    source = textwrap.dedent('''
+    class Foo:
+        @route(
+            "/é",
+            methods=('GET',),
+        )
+        def foo(self, a: int = 0x10, *args, b: 'Bar' = {  'c' : 1}):
+            pass
+    ''')
+
+    node = ast.parse(source).body[0].body[0]
+
+    assert make_signature(node.args, Source(source)) == [
+        'self', 'a: int = 0x10', '*args', "b: 'Bar' = {  'c' : 1}"
+    ]
+    assert Source(source).segment(node.decorator_list[0]) == (
+        'route(\n    "/é",\n    methods=(\'GET\',),\n)'
+    )
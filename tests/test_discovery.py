@@ -0,0 +1,138 @@
+import os
+
+from adoc.discovery import Discovery, GitIgnore, compile_patterns
+from adoc.parser import DEFAULT_EXCLUDE
+from adoc.utils import WorkingDirectory
+
+from conftest import touch, write
+
+
+def test_compile_patterns():
+    excluded = compile_patterns(DEFAULT_EXCLUDE)
+
+    assert excluded('tests')
+    assert excluded('foo.tests.bar')
+    assert excluded('test_foo.py')
+    assert excluded('conftest.py')
+    assert not excluded('foo')
+    assert not excluded('foo.py')
+
+    assert not compile_patterns([])('anything')
+
+
+def test_gitignore(tmpdir):
+    with open(str(tmpdir.join('.gitignore')), 'w') as fh:
+        fh.write('\n'.join([
+            '# Comment',
+            '*.gen.py',
+            '!keep.gen.py',
+            'build_output/',
+            '/top.py',
+            'docs/**/*.py',
+        ]))
+
+    gitignore = GitIgnore()
+    gitignore.load(str(tmpdir), '')
+
+    assert gitignore.ignored('foo.gen.py', False)
+    assert gitignore.ignored('pkg/foo.gen.py', False)
+    assert not gitignore.ignored('pkg/keep.gen.py', False)
+    assert gitignore.ignored('pkg/build_output', True)
+    assert not gitignore.ignored('pkg/build_output', False)
+    assert gitignore.ignored('top.py', False)
+    assert not gitignore.ignored('pkg/top.py', False)
+    assert gitignore.ignored('docs/a/b/conf.py', False)
+    assert gitignore.ignored('docs/conf.py', False)
+
+
+def test_find_packages(tmpdir):
+    root = str(tmpdir)
+
+    touch(
+        root,
+        'pkg/__init__.py',
+        'pkg/a.py',
+        'pkg/test_a.py',
+        'pkg/__main__.py',
+        'pkg/data.txt',
+        'pkg/generated.py',
+        'pkg/sub/__init__.py',
+        'pkg/sub/b.py',
+        'pkg/tests/__init__.py',
+        'pkg/tests/c.py',
+        'pkg/tests/nested/__init__.py',
+        'pkg/tests/nested/d.py',
+        'pkg/ignored/__init__.py',
+        'pkg/ignored/e.py',
+        'notpkg/inner/__init__.py',
+        'node_modules/pkg/__init__.py',
+        '.git/pkg/__init__.py',
+        'other/__init__.py',
+        'other/sub/__init__.py',
+        'other/sub/f.py',
+    )
+
+    write(os.path.join(root, '.gitignore'), 'generated.py\n')
+
+    write(os.path.join(root, 'pkg', '.gitignore'), 'ignored/\n')
+
+    with WorkingDirectory(root):
+        packages = Discovery('.', DEFAULT_EXCLUDE).find_packages('.')
+
+        assert [
+            (package, sorted(name for path, name in files))
+            for package, path, files in packages
+        ] == [
+            ('other', []),
+            ('other.sub', ['f.py']),
+            ('pkg', ['a.py']),
+            ('pkg.sub', ['b.py']),
+        ]
+
+        packages = Discovery(
+            '.', DEFAULT_EXCLUDE, gitignore=False
+        ).find_packages('.')
+
+        assert 'pkg.ignored' in [package for package, path, _ in packages]
+        assert ['a.py', 'generated.py'] == [
+            name for path, name in packages[2][2]
+        ]
+
+
+def test_pruned_dirs(tmpdir):
+    root = str(tmpdir)
+
+    touch(
+        root,
+        'pkg/__init__.py',
+        'pkg/build/__init__.py',
+        'pkg/dist/__init__.py',
+        'build/lib/pkg/__init__.py',
+        'dist/pkg/__init__.py',
+        'venv/__init__.py',
+    )
+
+    with WorkingDirectory(root):
+        packages = Discovery('.').find_packages('.')
+
+        assert sorted(package for package, path, _ in packages) == [
+            'pkg', 'pkg.build', 'pkg.dist', 'venv'
+        ]
+
+
+def test_list_files_gitignore(tmpdir):
+    root = str(tmpdir)
+
+    touch(
+        root,
+        'src/pkg/__init__.py',
+        'src/pkg/a.py',
+        'src/pkg/generated.py',
+    )
+
+    write(os.path.join(root, 'src', '.gitignore'), 'generated.py\n')
+
+    with WorkingDirectory(root):
+        files = Discovery('.').list_files(os.path.join('src', 'pkg'))
+
+        assert [name for path, name in files] == ['a.py']
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import markdown
+import pytest
+
+from docutils import core
+from docutils.writers.html4css1 import Writer
+
+from adoc.cache import Cache
+from adoc.errors import FatalError
+from adoc.formats import MD_ENGINES, highlight, set_md_engine
+from adoc.formats.md import format_md
+from adoc.formats.rst import RstEngine
+
+RST_SAMPLES = [
+    'Title\n=====\n\nSome *text*.\n',
+    'Note [#]_ and `link`_.\n\n.. [#] Footnote.\n\n.. _link: http://x.org\n',
+    'Value.\n\n.. deprecated:: 1.0\n    Use :func:`other` instead.\n',
+    'Unterminated `reference.\n',
+]
+
+
+def test_rst_engine():
+    engine = RstEngine()
+
+    for _ in range(2):
+        for text in RST_SAMPLES:
+            assert engine.render(text) == core.publish_parts(
+                text, writer=Writer()
+            )['fragment']
+
+
+def test_md_reset():
+    assert 'footnote' in format_md('Text[^1].\n\n[^1]: Footnote.\n')
+    assert format_md('Text.') == '<p>Text.</p>'
+
+    assert '<abbr' in format_md('HTML.\n\n*[HTML]: Hyper Text\n')
+    assert format_md('HTML.') == '<p>HTML.</p>'
+
+
+def test_md_threads():
+    texts = [
+        'Text {0}[^{0}].\n\n[^{0}]: Footnote {0}.\n'.format(idx)
+        for idx in range(50)
+    ]
+
+    expected = [format_md(text) for text in texts]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(format_md, texts)) == expected
+
+
+MD_SAMPLES = [
+    'Text.\n\n    :::python\n    def f(x):\n        return x < 1\n\nEnd.\n',
+    '```python\nprint(\'a\' "b")\n```\n\nEnd.\n',
+    '```\nplain <b>text</b>\n```\n',
+    '    #!/usr/bin/env python\n    x = 1\n',
+]
+
+
+def test_highlight(tmpdir):
+    stock = markdown.Markdown(extensions=[
+        'markdown.extensions.extra', 'markdown.extensions.codehilite'
+    ])
+
+    cache = highlight.highlighter.cache
+    highlight.setup(True, Cache(str(tmpdir)))
+
+    try:
+        for text in MD_SAMPLES:
+            assert format_md(text) == stock.reset().convert(text)
+
+        assert cache.misses == len(MD_SAMPLES)
+
+        format_md(MD_SAMPLES[0])
+        assert cache.hits == 1
+
+        cache.entries.clear()
+        format_md(MD_SAMPLES[0])
+        assert cache.store_hits == 1
+
+        highlight.setup(False)
+        assert '<span' not in format_md(MD_SAMPLES[0])
+    finally:
+        highlight.setup()
+        highlight.close()
+
+
+def test_highlight_raw_html():
+    raw = '<pre><code class="language-python">raw = 1</code></pre>'
+    text = 'Raw:\n\n{}\n\nFenced:\n\n```python\nx = 1\n```\n'.format(raw)
+
+    engines = [format_md]
+
+    try:
+        from adoc.formats import commonmark
+    except ImportError:
+        pass
+    else:
+        engines.append(commonmark.format_md)
+
+    for engine in engines:
+        html = engine(text)
+
+        assert raw in html
+        assert '<span class="n">x</span>' in html
+
+    assert highlight.highlight_blocks(raw, raw) == raw
+    assert highlight.highlight_blocks(raw) != raw
+
+
+# Markdown both engines render the same way.
+COMMONMARK_SAMPLES = [
+    'Simple *text* with `code`, **bold** and a [link](http://adoc.org).',
+    'Paragraph\ncontinued.\n\nAnother "one" & <b>raw</b> HTML.',
+    'Arguments:\n\n- `x`: first\n- `y`: second\n',
+    '1. One\n2. Two\n',
+    '# Title\n\n## Section\n\nText.',
+    '| a | b |\n|---|---|\n| 1 | 2 |\n',
+    '> Quote.\n',
+    'Trailing spaces  \nbreak the line.',
+    'Example:\n\n```python\nprint(\'a\' "b")\n```\n\nEnd.\n',
+    'Example:\n\n    x = 1\n',
+]
+
+
+def test_md_engines():
+    pytest.importorskip('markdown_it')
+
+    from adoc.formats import commonmark
+
+    def normalize(html):
+        return html.replace('&quot;', '"')
+
+    for text in COMMONMARK_SAMPLES:
+        assert normalize(commonmark.format_md(text)) == normalize(
+            format_md(text)
+        )
+
+
+def test_set_md_engine(monkeypatch):
+    with pytest.raises(FatalError):
+        set_md_engine('unknown')
+
+    monkeypatch.setitem(MD_ENGINES, 'missing', ('md', 'missing'))
+
+    with pytest.raises(FatalError):
+        set_md_engine('missing')
@@ -0,0 +1,198 @@
+import os
+import re
+import gzip
+import pytest
+import threading
+import urllib.error
+import urllib.request
+
+from adoc.httpd import Server
+from adoc.parser import ProjectParser
+from adoc.watcher import PollingWatcher
+
+from conftest import write
+
+
+def read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def test_incremental(project_dir, monkeypatch):
+    root = str(project_dir)
+
+    write(os.path.join(root, 'pkg', 'a.py'), 'def first_func():\n    pass\n')
+    write(os.path.join(root, 'pkg', 'b.py'), 'def second_func():\n    pass\n')
+
+    parser = ProjectParser(root, {}, no_setup=True)
+    server = Server('127.0.0.1', 0, parser, 'md', False)
+
+    try:
+        snapshot = server.build()
+        project = server.project
+
+        assert b'first_func' in read(snapshot)
+        assert server.build() is snapshot
+
+        def parse():
+            raise AssertionError('full parse')
+
+        monkeypatch.setattr(parser, 'parse', parse)
+
+        write(
+            os.path.join(root, 'pkg', 'a.py'), 'def third_func(x):\n    pass\n'
+        )
+
+        html = read(server.build())
+
+        assert not os.path.exists(snapshot)
+        assert server.project is project
+        assert b'third_func' in html
+        assert b'first_func' not in html
+        assert b'second_func' in html
+
+        write(os.path.join(root, 'pkg', 'a.py'), '')
+        server.build()
+
+        assert [f.name for f in server.project.iter_functions()] == [
+            'second_func'
+        ]
+    finally:
+        server.server_close()
+
+    assert not os.path.exists(server.directory)
+
+
+def test_structural_change(project_dir):
+    root = str(project_dir)
+
+    write(os.path.join(root, 'pkg', 'a.py'), 'def first_func():\n    pass\n')
+
+    parser = ProjectParser(root, {}, no_setup=True)
+    project = parser.parse()
+
+    write(os.path.join(root, 'pkg', 'b.py'), 'def second_func():\n    pass\n')
+
+    assert not parser.update(
+        project, {os.path.join(os.path.realpath(root), 'pkg', 'b.py')}
+    )
+    assert not parser.update(project, None)
+
+
+def test_new_package(project_dir):
+    root = os.path.realpath(str(project_dir))
+
+    write(os.path.join(root, 'pkg', 'plain', 'c.py'), 'def third_func(): pass')
+
+    parser = ProjectParser(root, {}, no_setup=True)
+    project = parser.parse()
+    watcher = PollingWatcher(root)
+
+    write(os.path.join(root, 'pkg', 'sub', '__init__.py'))
+    write(os.path.join(root, 'pkg', 'sub', 'b.py'), 'def second_func(): pass')
+
+    assert not parser.update(project, watcher.changes())
+
+    project = parser.parse()
+
+    assert 'second_func' in [f.name for f in project.iter_functions()]
+
+    write(os.path.join(root, 'pkg', 'plain', '__init__.py'))
+
+    assert not parser.update(project, watcher.changes())
+
+    write(os.path.join(root, '.gitignore'), 'pkg/sub/\n')
+
+    assert not parser.update(project, watcher.changes())
+
+
+def test_serve(project_dir):
+    root = str(project_dir)
+
+    write(os.path.join(root, 'pkg', 'a.py'), 'def served_func():\n    pass\n')
+
+    parser = ProjectParser(root, {}, no_setup=True)
+    server = Server('127.0.0.1', 0, parser, 'md', False)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    try:
+        url = 'http://127.0.0.1:{}/'.format(server.server_port)
+
+        with urllib.request.urlopen(url) as response:
+            body = response.read()
+
+        assert b'served_func' in body
+        assert int(response.headers['Content-Length']) == len(body)
+        assert body == read(server.snapshot)
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def test_serve_stylesheet(project_dir):
+    root = str(project_dir)
+
+    parser = ProjectParser(root, {}, no_setup=True)
+    server = Server('127.0.0.1', 0, parser, 'md', False, external_css=True)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    try:
+        url = 'http://127.0.0.1:{}/'.format(server.server_port)
+
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode('utf-8')
+
+        assert '<style' not in body
+
+        href = re.search(r'<link href="(/adoc\.[0-9a-f]+\.css)"', body) \
+            .group(1)
+
+        with urllib.request.urlopen(url + href[1:]) as response:
+            css = response.read()
+
+        assert 'immutable' in response.headers['Cache-Control']
+        assert response.headers['Content-Type'].startswith('text/css')
+
+        request = urllib.request.Request(
+            url + href[1:], headers={'Accept-Encoding': 'gzip'}
+        )
+
+        with urllib.request.urlopen(request) as response:
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert gzip.decompress(response.read()) == css
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def test_build_error(project_dir, monkeypatch):
+    root = str(project_dir)
+
+    parser = ProjectParser(root, {}, no_setup=True)
+    server = Server('127.0.0.1', 0, parser, 'md', False)
+
+    def build():
+        raise RuntimeError('broken build')
+
+    monkeypatch.setattr(server, 'build', build)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    try:
+        url = 'http://127.0.0.1:{}/'.format(server.server_port)
+
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(url)
+
+        assert excinfo.value.code == 500
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
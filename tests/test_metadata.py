@@ -0,0 +1,207 @@
+import os
+import textwrap
+
+import adoc.parser
+
+from adoc.metadata import (
+    read_metadata, read_pyproject, read_setup_cfg, read_setup_py
+)
+from adoc.parser import ProjectParser
+from adoc.utils import WorkingDirectory
+
+
+def write(path, text):
+    with open(path, 'w') as fh:
+        fh.write(
+            textwrap.dedent(text)
+        )
+
+
+def test_setup_py(tmpdir):
+    path = str(tmpdir.join('setup.py'))
+
+    write(path, '''
+    from setuptools import setup, find_packages
+
+    NAME = 'foo'
+
+    setup(
+        name=NAME,
+        version='1.0',
+        packages=['foo', 'foo.bar'],
+        cmdclass=make_commands(),
+    )
+    ''')
+
+    metadata, unresolved = read_setup_py(path)
+
+    assert metadata == {
+        'name': 'foo',
+        'version': '1.0',
+        'packages': ['foo', 'foo.bar']
+    }
+
+    assert unresolved == []
+
+    write(path, '''
+    import setuptools
+
+    setuptools.setup(name='foo', packages=setuptools.find_packages())
+    ''')
+
+    metadata, unresolved = read_setup_py(path)
+
+    assert metadata == {'name': 'foo'}
+    assert unresolved == []
+
+    write(path, '''
+    import setuptools
+
+    setuptools.setup(name='foo', license=get_license())
+    ''')
+
+    metadata, unresolved = read_setup_py(path)
+
+    assert metadata == {'name': 'foo'}
+    assert unresolved == ['license']
+
+    write(path, 'print("no setup")\n')
+
+    assert read_setup_py(path) == ({}, None)
+
+
+def test_setup_cfg(tmpdir):
+    path = str(tmpdir.join('setup.cfg'))
+
+    write(path, '''
+    [metadata]
+    name = foo
+    version = attr: foo.__version__
+    author = Jane Doe
+    home_page = https://example.com
+    project_urls =
+        Issues = https://example.com/issues
+
+    [options]
+    package_dir =
+        = src
+    packages = foo, foo.bar
+    scripts =
+        bin/foo
+        bin/bar
+    ''')
+
+    assert read_setup_cfg(path) == {
+        'name': 'foo',
+        'author': 'Jane Doe',
+        'url': 'https://example.com',
+        'project_urls': {
+            'Issues': 'https://example.com/issues'
+        },
+        'package_dir': {'': 'src'},
+        'packages': ['foo', 'foo.bar'],
+        'scripts': ['bin/foo', 'bin/bar']
+    }
+
+
+def test_setup_cfg_version_file(tmpdir):
+    write(str(tmpdir.join('setup.cfg')), '''
+    [metadata]
+    name = foo
+    version = file: VERSION
+    ''')
+
+    with WorkingDirectory(str(tmpdir)):
+        assert read_setup_cfg() == {'name': 'foo'}
+
+        write('VERSION', '1.2\n')
+
+        assert read_setup_cfg() == {'name': 'foo', 'version': '1.2'}
+
+
+def test_pyproject(tmpdir):
+    path = str(tmpdir.join('pyproject.toml'))
+
+    write(path, '''
+    [project]
+    name = "foo"
+    version = "2.0"
+    authors = [{name = "Jane Doe", email = "jane@example.com"}]
+    license = {text = "BSD"}
+
+    [project.urls]
+    Homepage = "https://example.com"
+
+    [tool.setuptools]
+    packages = ["foo"]
+    ''')
+
+    metadata = read_pyproject(path)
+
+    if metadata:  # Requires a TOML parser
+        assert metadata == {
+            'name': 'foo',
+            'version': '2.0',
+            'author': 'Jane Doe',
+            'author_email': 'jane@example.com',
+            'license': 'BSD',
+            'url': 'https://example.com',
+            'project_urls': {'Homepage': 'https://example.com'},
+            'packages': ['foo']
+        }
+
+
+def test_execution_fallback(tmpdir):
+    write(str(tmpdir.join('VERSION')), '3.0\n')
+    write(str(tmpdir.join('setup.cfg')), '''
+    [metadata]
+    name = foo
+    ''')
+    write(str(tmpdir.join('setup.py')), '''
+    from setuptools import setup
+
+    with open('VERSION') as fh:
+        version = fh.read().strip()
+
+    setup(version=version, cmdclass={'foo': object})
+    ''')
+
+    with WorkingDirectory(str(tmpdir)):
+        assert read_metadata() == {'name': 'foo', 'version': '3.0'}
+
+    write(str(tmpdir.join('setup.py')), '''
+    import time
+    from setuptools import setup
+
+    time.sleep(10)
+    setup(version=str(4))
+    ''')
+
+    with WorkingDirectory(str(tmpdir)):
+        assert read_metadata(timeout=0.5) == {'name': 'foo'}
+
+
+def test_cached(tmpdir, monkeypatch):
+    path = str(tmpdir.join('setup.py'))
+    write(path, 'from setuptools import setup\nsetup(name="foo")\n')
+
+    calls = []
+
+    def read_metadata():
+        calls.append(1)
+        return {'name': 'foo'}
+
+    monkeypatch.setattr(adoc.parser, 'read_metadata', read_metadata)
+
+    parser = ProjectParser(str(tmpdir), {})
+
+    assert parser.parse().name == 'foo'
+    assert parser.parse().name == 'foo'
+    assert len(calls) == 1
+
+    write(path, 'from setuptools import setup\nsetup(name="bar")\n')
+    os.utime(path)
+
+    parser.parse()
+
+    assert len(calls) == 2
@@ -0,0 +1,188 @@
+import gc
+import ast
+import os
+
+from adoc.models import Atom, Project, Module, Class, Function, Document
+from adoc.parser import ProjectParser
+from adoc.utils import find_heading
+
+from conftest import write
+
+
+def count_atoms():
+    gc.collect()
+
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, Atom))
+
+
+def test_no_leak(project_dir):
+    root = str(project_dir)
+
+    write(
+        os.path.join(root, 'pkg', 'mod.py'),
+        'class Foo:\n    def bar(self):\n        pass\n\n\n'
+        'def baz():\n    pass\n'
+    )
+    write(os.path.join(root, 'README.md'), '# Title\n')
+
+    def cycle():
+        project = ProjectParser(root, {}, no_setup=True).parse()
+
+        for atom in project.iter_modules() + project.iter_functions():
+            assert atom.fully_qualified_name
+
+        assert project.doc.title == 'Title'
+
+    cycle()
+    baseline = count_atoms()
+
+    for idx in range(50):
+        cycle()
+
+    assert count_atoms() <= baseline
+
+
+def test_document_invalidate(tmpdir):
+    path = str(tmpdir.join('doc.md'))
+
+    write(path, '# First\n')
+    document = Document(path)
+
+    assert document.title == 'First'
+
+    write(path, '# Second\n')
+
+    assert document.title == 'First'
+
+    document.invalidate()
+
+    assert document.title == 'Second'
+    assert '<h1>Second</h1>' in document.html
+
+
+def test_document_title(tmpdir):
+    path = str(tmpdir.join('doc.md'))
+
+    write(path, '# Q & A\n\nIntro.\n\n# Part\n\n' + 'Text.\n\n' * 5000)
+    assert Document(path).title == 'Q & A'
+
+    write(path, 'No heading.\n')
+    assert Document(path).title == 'doc'
+
+    html = '<p>a</p><h1 id="x">A <code>b</code> c</h1>'
+    assert find_heading(html) == 'A b c'
+    assert find_heading('<h2>a</h2><h1>b</h1>', chunk_size=3) == 'b'
+    assert find_heading('<h1>Title<br>Sub</h1><p>x</p>') == 'TitleSub'
+    assert find_heading('<h1><img src="a.png">Title<br/></h1>') == 'Title'
+
+
+def test_slots():
+    source = '@property\ndef foo(x):\n    pass\n\n\nclass Bar:\n    pass\n'
+
+    module = Module.from_ast(ast.parse(source), 'mod')
+    other = Module.from_ast(ast.parse(source), 'mod')
+
+    for atom in (module, module.functions[0], module.classes[0]):
+        assert not hasattr(atom, '__dict__')
+
+    foo, other_foo = module.functions[0], other.functions[0]
+
+    assert foo.decorators[0] is other_foo.decorators[0]
+    assert foo.parameters[0] is other_foo.parameters[0]
+
+
+def test_symbols():
+    project = ProjectParser('.', {}).parse()
+    symbols = project.symbols
+
+    assert project.symbols is symbols
+
+    assert symbols['adoc.models.Project'].name == 'Project'
+    assert symbols['adoc.models.Project.iter_modules'].name == 'iter_modules'
+    assert symbols.get('adoc.models.Nope') is None
+    assert 'adoc.parser' in symbols
+
+    for kind in ('modules', 'functions', 'classes'):
+        walked = getattr(project, 'iter_' + kind)(max_depth=100)
+
+        assert getattr(symbols, kind) == walked
+
+    project.remove_module(project.modules[0])
+
+    assert project.symbols is not symbols
+    assert len(project.symbols) < len(symbols)
+
+    symbols = project.symbols
+    package = project.modules[0]
+    module = Module('added', 'Doc.')
+
+    package.add_module(module)
+
+    assert project.symbols is not symbols
+    assert module in project.symbols.modules
+
+    symbols = project.symbols
+    package.replace_module(module, Module('replaced', 'Doc.'))
+
+    assert project.symbols is not symbols
+    assert module not in project.symbols.modules
+
+    symbols = project.symbols
+    package.remove_module(package.modules[-1])
+
+    assert project.symbols is not symbols
+
+
+def test_counts():
+    project = Project('project', None)
+    package = Module('package')
+    sub = Module('sub')
+
+    project.add_module(package)
+    package.add_module(sub)
+
+    assert project.is_empty() and package.is_empty() and sub.is_empty()
+
+    sub.add_function(Function('foo'))
+
+    assert not project.is_empty() and not package.is_empty()
+    assert project.function_count == package.function_count == 1
+    assert project.module_count == package.module_count == 1
+
+    other = Module('sub')
+    other.add_class(Class('Bar'))
+    other.add_class(Class('Baz'))
+    package.replace_module(sub, other)
+
+    assert project.function_count == 0
+    assert project.class_count == 2
+    assert package.module_count == 1
+
+    package.remove_module(other)
+
+    assert project.is_empty() and package.is_empty()
+    assert project.module_count == package.module_count == 0
+
+
+def test_counts_parsed():
+    project = ProjectParser('.', {}).parse()
+
+    def check(node):
+        functions = len(getattr(node, 'functions', None) or [])
+        classes = len(getattr(node, 'classes', None) or [])
+        modules = 0
+
+        for module in node.modules or []:
+            check(module)
+
+            functions += module.function_count
+            classes += module.class_count
+            modules += not module.is_empty()
+
+        assert node.function_count == functions
+        assert node.class_count == classes
+        assert node.module_count == modules
+
+    check(project)
+
+    assert project.function_count == len(project.iter_functions())
@@ -0,0 +1,174 @@
+import ast
+import glob
+import textwrap
+
+from adoc.codegen import Source
+from adoc.models import Module
+from adoc.outline import Scanner, Unsupported, logical_lines, parse_outline
+from adoc.parser import ProjectParser
+
+
+def dump(atom):
+    return (
+        atom.type,
+        atom.name,
+        atom.doc,
+        getattr(atom, 'decorators', None),
+        getattr(atom, 'parameters', None),
+        getattr(atom, 'bases', None),
+        [dump(f) for f in getattr(atom, 'functions', None) or []],
+        [dump(c) for c in getattr(atom, 'classes', None) or []],
+    )
+
+
+def check(source):
+    source = textwrap.dedent(source)
+
+    expected = dump(
+        Module.from_ast(ast.parse(source), 'mod')
+    )
+
+    assert dump(Scanner(source).scan('mod')) == expected
+    assert dump(parse_outline(source, 'mod')) == expected
+
+    expected = dump(
+        Module.from_ast(ast.parse(source), 'mod', Source(source))
+    )
+
+    assert dump(Scanner(source, True).scan('mod')) == expected
+    assert dump(parse_outline(source, 'mod', True)) == expected
+
+
+def test_outline():
+    check('''
+    """Module docstring."""
+
+    import os
+
+
+    @decorator(x=[1, 2])
+    @other
+    def foo(a, b={'c': 1},
+            *args, **kwargs):
+        """Function docstring.
+
+        With details.
+        """
+        def nested():
+            pass
+
+        return a
+
+
+    def one_liner(): 'doc'
+
+
+    class Foo(Base, metaclass=Meta):
+        # Comment
+        r\'\'\'Class docstring.\'\'\'
+        attribute = """not a docstring"""
+
+        @property
+        def bar(self):
+            "Method" "docstring"
+
+        async def baz(self):
+            pass
+
+        class Nested:
+            def skipped(self):
+                pass
+
+        if True:
+            def skipped_too(self):
+                pass
+
+        def quux(self, x=lambda y: y): pass
+
+        @route(
+            '/path',  # Comment
+            methods=['GET'],
+        )
+        def view(self, a: int = 1, /, *, b: 'str' = "x", **kwargs):
+            pass
+
+
+    if True:
+        def conditional():
+            pass
+
+
+    async def coroutine():
+        pass
+    ''')
+
+
+def test_not_docstrings():
+    check('''
+    "not".join([])
+
+    def foo():
+        "a" + "b"
+
+    class Foo:
+        42
+    ''')
+
+
+def test_empty():
+    check('')
+    check('# Just a comment\n')
+
+
+def test_logical_lines():
+    source = textwrap.dedent('''
+    def foo():
+        """Doc."""
+        first = 1
+        if first:
+            nested = 2
+
+    class Foo:
+        def bar(self):
+            """Doc."""
+            body = 3
+            if body:
+                nested = 4
+    ''')
+
+    names = [
+        token.string
+        for depth, tokens in logical_lines(source) for token in tokens
+    ]
+
+    assert '"""Doc."""' in names
+    assert 'bar' in names
+    assert not {'first', 'nested', 'body'} & set(names)
+
+
+def test_fallback():
+    source = 'def foo(): "doc"; pass\n'
+
+    try:
+        Scanner(source).scan('mod')
+    except Unsupported:
+        pass
+    else:
+        assert False, 'scanner should not handle compound statements'
+
+    assert parse_outline(source, 'mod').functions[0].doc == 'doc'
+
+
+def test_sources():
+    for path in glob.glob('**/*.py', recursive=True):
+        with open(path) as fh:
+            check(fh.read())
+
+
+def test_parse_outline():
+    project = ProjectParser('.', {}).parse()
+    outlined = ProjectParser('.', {}, outline=0).parse()
+
+    assert [dump(m) for m in project.iter_modules()] == [
+        dump(m) for m in outlined.iter_modules()
+    ]
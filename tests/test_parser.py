@@ -9,15 +9,15 @@ def test_parse(capsys):
 
     assert 'Project' in str(project)
 
-    assert 15 == len(
+    assert 23 == len(
         project.iter_modules()
     )
 
-    assert 21 == len(
+    assert 110 == len(
         project.iter_functions()
     )
 
-    assert 20 == len(
+    assert 34 == len(
         project.iter_classes()
     )
 
@@ -25,3 +25,21 @@ def test_parse(capsys):
 
     assert not cap.err
     assert not cap.out
+
+
+def test_parse_jobs():
+    serial = ProjectParser('.', {}).parse()
+    parallel = ProjectParser('.', {}, jobs=2).parse()
+
+    def outline(project):
+        return [
+            (f.fully_qualified_name, f.parameters, f.decorators, f.doc)
+            for f in project.iter_functions()
+        ] + [
+            (m.fully_qualified_name, m.doc) for m in project.iter_modules()
+        ]
+
+    assert outline(serial) == outline(parallel)
+    assert [m.name for m in serial.modules] == [
+        m.name for m in parallel.modules
+    ]
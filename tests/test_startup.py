@@ -0,0 +1,68 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))
+)
+
+HEAVY_MODULES = [
+    'bs4',
+    'concurrent.futures.process',
+    'docutils',
+    'mako',
+    'markdown',
+    'pygments',
+    'setuptools',
+]
+
+# Cumulative import time of `adoc.cli`, in seconds: a generous bound, startup
+# takes about 0.1s on a typical machine.
+STARTUP_THRESHOLD = 0.5
+
+
+def import_times(*args):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=ROOT,
+        check=True
+    )
+
+    times = {}
+
+    for line in result.stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        self_time, cumulative, name = line[12:].split('|')
+        times[name.strip()] = int(cumulative) / 1000000
+
+    return times
+
+
+def assert_light(times):
+    for module in HEAVY_MODULES:
+        assert module not in times, '{} imported eagerly'.format(module)
+
+
+def test_import():
+    times = import_times('-c', 'import adoc.cli')
+
+    assert_light(times)
+    assert times['adoc.cli'] < STARTUP_THRESHOLD
+
+
+def test_version():
+    assert_light(
+        import_times('-m', 'adoc', '--version')
+    )
+
+
+def test_md_build(tmpdir):
+    times = import_times(
+        '-m', 'adoc', '--no-cache', '--md', str(tmpdir.join('api.md')), '.'
+    )
+
+    assert_light(times)
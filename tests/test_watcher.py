@@ -0,0 +1,48 @@
+import os
+import pytest
+
+from adoc.watcher import InotifyWatcher, PollingWatcher
+
+from conftest import write
+
+
+def check_watcher(cls, tmpdir):
+    root = os.path.realpath(str(tmpdir))
+
+    os.mkdir(os.path.join(root, 'pkg'))
+    os.mkdir(os.path.join(root, '.git'))
+    write(os.path.join(root, 'pkg', 'a.py'), 'a = 1\n')
+
+    watcher = cls(root)
+
+    assert watcher.changes() == set()
+
+    write(os.path.join(root, 'pkg', 'a.py'), 'a = 22\n')
+    write(os.path.join(root, 'b.py'), 'b = 1\n')
+    write(os.path.join(root, '.git', 'HEAD'), 'ref\n')
+
+    changes = watcher.changes()
+
+    assert os.path.join(root, 'pkg', 'a.py') in changes
+    assert os.path.join(root, 'b.py') in changes
+    assert os.path.join(root, '.git', 'HEAD') not in changes
+
+    os.remove(os.path.join(root, 'b.py'))
+
+    assert os.path.join(root, 'b.py') in watcher.changes()
+    assert watcher.changes() == set()
+
+    watcher.close()
+
+
+def test_polling(tmpdir):
+    check_watcher(PollingWatcher, tmpdir)
+
+
+def test_inotify(tmpdir):
+    try:
+        InotifyWatcher(str(tmpdir)).close()
+    except OSError:
+        pytest.skip('inotify unavailable')
+
+    check_watcher(InotifyWatcher, tmpdir)
@@ -1,11 +1,18 @@
+import os
+import glob
+import gzip
+import stat
 import pytest
 import tempfile
 
+from adoc import formats
+from adoc.cache import Cache, RenderCache
 from adoc.errors import FatalError
 from adoc.parser import ProjectParser
 from adoc.writers import (
-    write_html, write_md, write_pdf
+    write_html, write_html_dir, write_md, write_pdf
 )
+from adoc.writers.html import get_lookup, make_html
 
 
 def test_html_md(capsys):
@@ -106,3 +113,137 @@ def test_pdf_rst(capsys):
 
     assert not cap.err
     assert not cap.out
+
+
+def test_template_lookup(tmpdir):
+    assert get_lookup() is get_lookup()
+
+    project = ProjectParser('examples/flask-project', {}).parse()
+    cache = Cache(str(tmpdir))
+
+    make_html(project, 'md', False, RenderCache(cache))
+
+    assert glob.glob(str(tmpdir.join('templates', '*', 'html.mako.py')))
+    assert not any(
+        path.endswith('.py') for mtime, size, path in cache.entries()
+    )
+
+
+def test_html_dir(tmpdir, project_dir):
+    project_dir.join('pkg', 'a.py').write('def func_a():\n    pass\n')
+    project_dir.join('pkg', 'b.py').write('def func_b():\n    pass\n')
+
+    output = tmpdir.join('docs')
+    pages = output.join('modules')
+
+    def build():
+        project = ProjectParser(str(project_dir), {}, no_setup=True).parse()
+        write_html_dir(str(output), project, 'md', False)
+
+        return {
+            name: os.stat(str(pages.join(name))).st_mtime_ns
+            for name in os.listdir(str(pages))
+        }
+
+    before = build()
+
+    assert 'func_a' in output.join('index.html').read()
+    assert 'func_a' in pages.join('pkg.a.html').read()
+    assert 'func_b' not in pages.join('pkg.a.html').read()
+
+    assert build() == before
+
+    project_dir.join('pkg', 'a.py').write('def func_c():\n    pass\n')
+    after = build()
+
+    assert after['pkg.a.html'] != before['pkg.a.html']
+    assert after['pkg.b.html'] == before['pkg.b.html']
+    assert 'func_c' in pages.join('pkg.a.html').read()
+
+    project_dir.join('pkg', 'b.py').remove()
+
+    assert 'pkg.b.html' not in build()
+
+
+def test_html_dir_mode(tmpdir, project_dir):
+    project_dir.join('pkg', 'a.py').write('def func_a():\n    pass\n')
+
+    output = tmpdir.join('docs')
+    project = ProjectParser(str(project_dir), {}, no_setup=True).parse()
+
+    umask = os.umask(0o027)
+
+    try:
+        write_html_dir(str(output), project, 'md', False)
+    finally:
+        os.umask(umask)
+
+    index = output.join('index.html')
+    page = output.join('modules', 'pkg.a.html')
+
+    for path in (index, page):
+        assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o640
+
+
+def test_html_dir_jobs(tmpdir, project_dir):
+    for idx in range(6):
+        project_dir.join('pkg', 'mod{}.py'.format(idx)).write(
+            'def func():\n    """Function `{}`."""\n'.format(idx) * (idx + 1)
+        )
+
+    project = ProjectParser(str(project_dir), {}, no_setup=True).parse()
+
+    write_html_dir(str(tmpdir.join('serial')), project, 'md', False, jobs=1)
+    write_html_dir(str(tmpdir.join('pool')), project, 'md', False, jobs=2)
+
+    names = os.listdir(str(tmpdir.join('serial', 'modules')))
+
+    assert len(names) == 7
+    assert sorted(names) == sorted(
+        os.listdir(str(tmpdir.join('pool', 'modules')))
+    )
+
+    for name in names:
+        assert tmpdir.join('serial', 'modules', name).read() == \
+            tmpdir.join('pool', 'modules', name).read()
+
+
+def test_html_dir_jobs_error(tmpdir, project_dir, monkeypatch):
+    for idx in range(6):
+        project_dir.join('pkg', 'mod{}.py'.format(idx)).write(
+            'def func(): pass'
+        )
+
+    project = ProjectParser(str(project_dir), {}, no_setup=True).parse()
+
+    # Settings are sent to workers, which fail to apply them.
+    monkeypatch.setattr(formats, 'md_engine', 'missing')
+
+    with pytest.raises(FatalError):
+        write_html_dir(str(tmpdir.join('pool')), project, 'md', False, jobs=2)
+
+
+def test_external_css(tmpdir, project_dir):
+    project_dir.join('pkg', 'a.py').write('def func_a():\n    pass\n')
+
+    output = tmpdir.join('docs')
+    project = ProjectParser(str(project_dir), {}, no_setup=True).parse()
+
+    write_html_dir(str(output), project, 'md', False, external_css=True)
+
+    stylesheets = glob.glob(str(output.join('adoc.*.css')))
+    assert len(stylesheets) == 1
+
+    name = os.path.basename(stylesheets[0])
+    css = output.join(name).read_binary()
+
+    assert gzip.decompress(output.join(name + '.gz').read_binary()) == css
+    assert 'href="{}"'.format(name) in output.join('index.html').read()
+    assert 'href="../{}"'.format(name) in \
+        output.join('modules', 'pkg.a.html').read()
+    assert '<style' not in output.join('modules', 'pkg.a.html').read()
+
+    write_html_dir(str(output), project, 'md', False)
+
+    assert not glob.glob(str(output.join('adoc.*')))
+    assert '<style' in output.join('modules', 'pkg.a.html').read()